@@ -1,114 +1,147 @@
 import os
-import json
-import subprocess
 import threading
-import difflib
+from types import MappingProxyType
+
+from core.app_index import AppIndex, registry_signature
+from core.launcher import LaunchHistory
+from core.storage import open_storage
+from core.app_scanner import IncrementalScanner, PackageSource, ShortcutSource, guess_category, powershell_packages
+
+class RegistrySnapshot:
+    """One immutable version of the registry together with the index built for it.
+
+    Scans build a new snapshot and publish it with a single reference assignment, so readers
+    that grab `discovery.snapshot` once see a consistent registry without taking a lock.
+    """
+    __slots__ = ("apps", "index", "version", "_summary")
+
+    def __init__(self, apps, index, version):
+        self.apps = MappingProxyType(apps)
+        self.index = index
+        self.version = version
+        self._summary = None # Filled on first get_app_summary()
 
 class AppDiscovery:
-    def __init__(self, registry_path="data/app_registry.json"):
+    def __init__(self, registry_path="data/app_registry.json", shortcut_roots=None, package_lister=None, packages_dir=None, history=None, storage=None):
         self.registry_path = registry_path
-        self.apps = {}
+        self.index_path = os.path.join(os.path.dirname(registry_path), "app_index.json")
+        self.db = storage or open_storage(os.path.join(os.path.dirname(registry_path), "alex.db"))
+        self.history = history or LaunchHistory(self.db)
+        self.scanner = IncrementalScanner([ShortcutSource(shortcut_roots), PackageSource(package_lister or powershell_packages, packages_dir)],
+                                          self.db, os.path.join(os.path.dirname(registry_path), "app_scan_state.json"))
+        self.snapshot = RegistrySnapshot({}, AppIndex(), 0)
+        self._write_lock = threading.Lock() # Serializes writers only; readers never lock
         self.load_registry()
 
+    @property
+    def apps(self): return self.snapshot.apps
+
+    @property
+    def index(self): return self.snapshot.index
+
+    @property
+    def version(self): return self.snapshot.version # Bumped whenever the registry contents change
+
     def load_registry(self):
-        if os.path.exists(self.registry_path):
-            with open(self.registry_path, 'r', encoding='utf-8') as f:
-                self.apps = json.load(f)
+        # One-time import of the JSON registry used before the SQLite store
+        self.db.migrate_json(self.registry_path, lambda apps: self.db.put_many("apps", apps.items()))
+        apps = self.db.items("apps")
+        if not apps: return
+        # Reuse the persisted index when it was built for this exact registry
+        index = AppIndex.load(self.index_path, registry_signature(apps))
+        with self._write_lock:
+            self._publish(apps, index)
+        if index is None: self._save_index(self.snapshot)
 
-    def save_registry(self):
-        os.makedirs(os.path.dirname(self.registry_path), exist_ok=True)
-        with open(self.registry_path, 'w', encoding='utf-8') as f:
-            json.dump(self.apps, f, indent=2)
+    def _publish(self, apps, index=None):
+        # Caller holds self._write_lock. Everything is built before the swap.
+        snap = RegistrySnapshot(apps, index or AppIndex.from_apps(apps), self.snapshot.version + 1)
+        self.snapshot = snap
+        return snap
 
-    def full_scan(self):
-        """Orchestrates all scan methods."""
+    def _save_index(self, snap):
+        try: snap.index.save(self.index_path, registry_signature(snap.apps))
+        except OSError as e: print(f"[AppDiscovery] Index save failed: {e}")
+
+    def save_registry(self, snap=None):
+        """Rewrites the whole stored registry; scans persist only their delta."""
+        snap = snap or self.snapshot
+        with self.db.transaction():
+            self.db.clear("apps")
+            self.db.put_many("apps", snap.apps.items())
+
+    def _save_delta(self, upserts, removed):
+        # The scan state goes in the same commit, so a crash cannot keep it without the delta
+        with self.db.transaction():
+            for key in removed: self.db.delete("apps", key)
+            self.db.put_many("apps", upserts.items())
+            self.scanner.save_state()
+
+    def full_scan(self, force=False):
+        """Incremental scan of all sources; a changed registry is published as a new snapshot."""
         print("[AppDiscovery] Deep scan initiated...")
-        self._scan_start_menu()
-        self._scan_uwp_apps()
-        self.save_registry()
-        print(f"[AppDiscovery] Scan complete. Found {len(self.apps)} unique entry points.")
-
-    def _scan_start_menu(self):
-        """Scans .lnk files from global and user start menus."""
-        paths = [
-            os.path.join(os.environ["ProgramData"], "Microsoft", "Windows", "Start Menu", "Programs"),
-            os.path.join(os.environ["APPDATA"], "Microsoft", "Windows", "Start Menu", "Programs")
-        ]
-        
-        for p in paths:
-            if not os.path.exists(p): continue
-            for root, _, files in os.walk(p):
-                for f in files:
-                    if f.lower().endswith(".lnk"):
-                        name = f[:-4].lower()
-                        full_path = os.path.join(root, f)
-                        self.apps[name] = {
-                            "name": f[:-4],
-                            "type": "shortcut",
-                            "path": full_path,
-                            "category": self._guess_category(name)
-                        }
-
-    def _scan_uwp_apps(self):
-        """Uses PowerShell to get Microsoft Store / UWP apps."""
-        try:
-            cmd = 'PowerShell "Get-AppxPackage | Select Name, PackageFamilyName"'
-            res = subprocess.check_output(cmd, shell=True).decode('utf-8', errors='ignore')
-            
-            lines = res.split('\r\n')
-            for line in lines:
-                if "  " in line:
-                    parts = [p.strip() for p in line.split("  ") if p.strip()]
-                    if len(parts) >= 2:
-                        name = parts[0].lower()
-                        family_name = parts[1]
-                        self.apps[name] = {
-                            "name": parts[0],
-                            "type": "uwp",
-                            "identity": family_name,
-                            "path": rf"shell:AppsFolder\{family_name}!App",
-                            "category": self._guess_category(name)
-                        }
-        except Exception as e:
-            print(f"[AppDiscovery] UWP Scan Error: {e}")
+        with self._write_lock:
+            if force: self.scanner.reset()
+            upserts, removed = self.scanner.scan(self.snapshot.apps)
+            snap = None
+            if upserts or removed:
+                apps = dict(self.snapshot.apps)
+                for key in removed: apps.pop(key, None)
+                apps.update(upserts)
+                snap = self._publish(apps)
+            # Readers already see the new snapshot; persistence happens after the swap
+            self._save_delta(upserts, removed)
+        if snap: self._save_index(snap)
+        print(f"[AppDiscovery] Scan complete. {len(upserts)} updated, {len(removed)} removed, {len(self.apps)} unique entry points. {self.scanner.last_stats}")
 
     def _guess_category(self, name):
-        name = name.lower()
-        if any(x in name for x in ["music", "player", "spotify", "vlc", "groove"]): return "music"
-        if any(x in name for x in ["chrome", "edge", "firefox", "browser"]): return "browser"
-        if any(x in name for x in ["code", "notep", "studio", "sublime"]): return "editor"
-        return "general"
+        return guess_category(name)
 
     def find_app(self, query):
         """Intelligent lookup prioritizing name similarity."""
+        return self.lookup(query)[1]
+
+    def lookup(self, query):
+        """(key, app) for `query` from one snapshot, or (None, None); a rescan in between cannot
+        make the key miss."""
+        snap = self.snapshot
+        key = self.find_app_key(query, snap)
+        return (key, snap.apps[key]) if key else (None, None)
+
+    def find_app_key(self, query, snap=None):
+        """Registry key for `query`; frequently launched apps win close calls."""
         query = query.lower().strip()
+        snap = snap or self.snapshot
         
         # 1. Exact Match
-        if query in self.apps: return self.apps[query]
+        if query in snap.apps: return query
         
-        # 2. Fuzzy Name Match (High cutoff)
-        matches = difflib.get_close_matches(query, self.apps.keys(), n=1, cutoff=0.6)
-        if matches: return self.apps[matches[0]]
+        # 2. Indexed Name Match (High cutoff), boosted by launch history
+        hits = snap.index.search(query, limit=5, min_score=0.3)
+        if hits and self.history:
+            hits = sorted(((s + self.history.boost(k), k) for s, k in hits), key=lambda h: -h[0])
+        if hits and hits[0][0] >= 0.6: return hits[0][1]
         
         # 3. Category Search (Only if query contains category keywords)
         if "player" in query or "music" in query:
-            for app in self.apps.values():
-                if app["category"] == "music": return app
+            key = snap.index.category_app("music")
+            if key: return key
         
         if "browser" in query or "web" in query:
-            for app in self.apps.values():
-                if app["category"] == "browser": return app
+            key = snap.index.category_app("browser")
+            if key: return key
 
-        # 4. Fallback Fuzzy (Lower cutoff)
-        matches = difflib.get_close_matches(query, self.apps.keys(), n=1, cutoff=0.3)
-        if matches: return self.apps[matches[0]]
+        # 4. Fallback Match (Lower cutoff)
+        if hits: return hits[0][1]
         
         return None
 
     def get_app_summary(self):
         """Returns a concise string of available apps for AI context."""
+        snap = self.snapshot
+        if snap._summary is not None: return snap._summary
         summary = {}
-        for app in self.apps.values():
+        for app in snap.apps.values():
             cat = app.get("category", "general")
             if cat not in summary: summary[cat] = []
             if len(summary[cat]) < 10:
@@ -117,4 +150,5 @@ class AppDiscovery:
         lines = []
         for cat, names in summary.items():
             lines.append(f"- {cat.upper()}: {', '.join(names)}")
-        return "\n".join(lines)
\ No newline at end of file
+        snap._summary = "\n".join(lines)
+        return snap._summary
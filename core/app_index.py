@@ -0,0 +1,181 @@
+import bisect
+import hashlib
+import json
+import os
+import random
+import re
+import time
+from collections import Counter, defaultdict
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+def trigrams(text):
+    padded = f"  {' '.join(tokenize(text))} "
+    return {padded[i:i+3] for i in range(len(padded) - 2)}
+
+def acronym(tokens):
+    return "".join(t[0] for t in tokens) if len(tokens) > 1 else ""
+
+def registry_signature(apps):
+    """Stable fingerprint of the registry keys; an index is only reused for the same key set."""
+    h = hashlib.sha1()
+    for k in sorted(apps): h.update(k.encode("utf-8")); h.update(b"\0")
+    return h.hexdigest()
+
+class AppIndex:
+    """Inverted token/trigram index over registry keys, for ranked "open X" lookups.
+
+    Scores are in 0..1: exact 1.0, whole-name prefix ~0.95, acronym ("vsc" -> visual studio code)
+    0.9, otherwise the best of token-set overlap (with token prefixes) and trigram Dice similarity.
+    Ids are assigned shortest name first, so capping a candidate list keeps the likeliest names.
+    The trigram pass only runs when tokens found nothing strong, and only over the rarest grams.
+    """
+    VERSION = 1
+
+    def __init__(self, keys=(), categories=None, postings=None):
+        self.keys = sorted(keys, key=lambda k: (len(k), k))
+        self.ids = {k: i for i, k in enumerate(self.keys)}
+        self.sorted_keys = sorted(self.keys) # For whole-name prefix ranges
+        self._tokens = {}; self._grams = {}  # Per-key features, computed on first score
+        if postings:
+            self.token_postings, self.gram_postings, self.acronyms = postings
+        else:
+            self.token_postings = defaultdict(list) # token -> ids (ascending)
+            self.gram_postings = defaultdict(list)  # trigram -> ids (ascending)
+            self.acronyms = defaultdict(list)       # initials -> ids
+            for i, k in enumerate(self.keys):
+                toks = self._key_tokens(i)
+                for t in dict.fromkeys(toks): self.token_postings[t].append(i)
+                for g in self._key_grams(i): self.gram_postings[g].append(i)
+                a = acronym(toks)
+                if a: self.acronyms[a].append(i)
+        self.vocab = sorted(self.token_postings)
+        self.by_category = {} # category -> first (shortest) key
+        for k, cat in sorted((categories or {}).items(), key=lambda kv: self.ids.get(kv[0], len(self.keys))):
+            if k in self.ids: self.by_category.setdefault(cat, k)
+
+    @classmethod
+    def from_apps(cls, apps):
+        return cls(apps.keys(), {k: a.get("category", "general") for k, a in apps.items()})
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _key_tokens(self, i):
+        toks = self._tokens.get(i)
+        if toks is None: toks = self._tokens[i] = tokenize(self.keys[i])
+        return toks
+
+    def _key_grams(self, i):
+        grams = self._grams.get(i)
+        if grams is None: grams = self._grams[i] = trigrams(self.keys[i])
+        return grams
+
+    @staticmethod
+    def _prefix_range(items, prefix):
+        lo = bisect.bisect_left(items, prefix)
+        return items[lo:bisect.bisect_left(items, prefix + "\uffff", lo)]
+
+    def _token_candidates(self, q_tokens, cap):
+        """Ids containing every query token (or a token it prefixes), shortest names first."""
+        result = None
+        for qt in sorted(q_tokens, key=len, reverse=True): # Longest tokens are the most selective
+            ids = set()
+            for t in (self._prefix_range(self.vocab, qt) if len(qt) > 1 else [qt]):
+                ids.update(self.token_postings.get(t, ()))
+            result = ids if result is None else result & ids
+            if not result: return set()
+        return set(sorted(result)[:cap]) if result else set()
+
+    def _gram_candidates(self, q_grams, cap, rare=6):
+        postings = sorted((p for p in (self.gram_postings.get(g) for g in q_grams) if p), key=len)[:rare]
+        counts = Counter()
+        for p in postings: counts.update(p[:cap * 8])
+        return {i for i, n in counts.most_common(cap) if n > 1}
+
+    def _score(self, i, q, q_tokens, q_grams):
+        key = self.keys[i]
+        if key == q: return 1.0
+        if key.startswith(q): return 0.95 - 0.05 * min(1.0, (len(key) - len(q)) / 40)
+        toks = self._key_tokens(i)
+        if len(q_tokens) == 1 and acronym(toks) == q: return 0.9
+        token_score = 0.0
+        if q_tokens and toks:
+            hits = sum(1.0 if qt in toks else 0.8 if any(t.startswith(qt) for t in toks) else 0.0 for qt in q_tokens)
+            token_score = 0.85 * hits / (max(len(q_tokens), len(toks)) * len(q_tokens)) ** 0.5
+        grams = self._key_grams(i)
+        gram_score = 2 * len(q_grams & grams) / (len(q_grams) + len(grams)) if q_grams else 0.0
+        return max(token_score, gram_score)
+
+    def search(self, query, limit=5, min_score=0.3, candidates=64):
+        """Returns [(score, key)] best first, shorter names winning ties."""
+        q = query.lower().strip()
+        q_tokens = tokenize(q)
+        if not q_tokens: return []
+        q_grams = trigrams(q)
+        found = set()
+        if q in self.ids: found.add(self.ids[q])
+        found.update(self.ids[k] for k in self._prefix_range(self.sorted_keys, q)[:candidates])
+        if len(q_tokens) == 1: found.update(self.acronyms.get(q, ())[:candidates])
+        found |= self._token_candidates(q_tokens, candidates)
+        scored = {i: self._score(i, q, q_tokens, q_grams) for i in found}
+        if not scored or max(scored.values()) < 0.6: # Probably a typo: fall back to trigram overlap
+            for i in self._gram_candidates(q_grams, candidates // 2) - found:
+                scored[i] = self._score(i, q, q_tokens, q_grams)
+        results = sorted(((s, i) for i, s in scored.items() if s >= min_score), key=lambda r: (-r[0], r[1]))
+        return [(s, self.keys[i]) for s, i in results[:limit]]
+
+    def category_app(self, category):
+        return self.by_category.get(category)
+
+    def to_dict(self, signature):
+        return {"version": self.VERSION, "signature": signature, "keys": self.keys,
+                "categories": {k: c for c, k in self.by_category.items()},
+                "tokens": self.token_postings, "grams": self.gram_postings, "acronyms": self.acronyms}
+
+    def save(self, path, signature):
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f: json.dump(self.to_dict(signature), f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, signature):
+        """Returns the persisted index if it was built for this registry, else None."""
+        try:
+            with open(path, "r", encoding="utf-8") as f: data = json.load(f)
+        except (OSError, ValueError): return None
+        if data.get("version") != cls.VERSION or data.get("signature") != signature: return None
+        return cls(data["keys"], data.get("categories", {}), postings=(data["tokens"], data["grams"], data["acronyms"]))
+
+def synthetic_registry(count, seed=0):
+    """A registry shaped like a crowded Start Menu: vendor, made-up product names and common suffixes."""
+    rng = random.Random(seed)
+    syllables = ["ka", "lo", "mi", "tra", "zen", "vo", "rex", "qui", "dan", "sol", "ter", "nix", "pro", "ax", "el", "or"]
+    products = sorted({"".join(rng.choice(syllables) for _ in range(rng.randint(2, 3))) for _ in range(4000)})
+    vendors = ["microsoft", "adobe", "google", "jetbrains", "autodesk", "nvidia", "intel", "oracle", "corel", "valve"]
+    words = ["studio", "player", "manager", "editor", "viewer", "center", "tools", "console", "client", "update",
+             "designer", "reader", "photo", "video", "audio", "music", "office", "sync", "backup", "monitor"]
+    apps = {}
+    while len(apps) < count:
+        name = " ".join([rng.choice(vendors)] * (rng.random() < 0.3) + [rng.choice(products)] + rng.sample(words, rng.randint(0, 2)))
+        apps[name] = {"name": name.title(), "type": "shortcut", "path": f"C:\\Apps\\{name}.lnk", "category": "general"}
+    return apps
+
+def benchmark(count=10000, queries=1000, seed=0):
+    """Builds an index over a synthetic registry; returns (build ms, mean lookup ms, p99 lookup ms)."""
+    apps = synthetic_registry(count, seed)
+    t0 = time.perf_counter(); index = AppIndex.from_apps(apps); build_ms = (time.perf_counter() - t0) * 1000
+    rng = random.Random(seed + 1); keys = list(apps)
+    samples = []
+    for _ in range(queries):
+        k = rng.choice(keys); kind = rng.random()
+        if kind < 0.3: q = k
+        elif kind < 0.6: q = " ".join(k.split()[:2])
+        elif kind < 0.8 or " " not in k: q = k[:-1] + "x" # Typo
+        else: q = acronym(k.split())
+        t = time.perf_counter(); index.search(q, limit=1); samples.append((time.perf_counter() - t) * 1000)
+    samples.sort()
+    return build_ms, sum(samples) / len(samples), samples[int(len(samples) * 0.99) - 1]
@@ -0,0 +1,168 @@
+import os
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+def guess_category(name):
+    name = name.lower()
+    if any(x in name for x in ["music", "player", "spotify", "vlc", "groove"]): return "music"
+    if any(x in name for x in ["chrome", "edge", "firefox", "browser"]): return "browser"
+    if any(x in name for x in ["code", "notep", "studio", "sublime"]): return "editor"
+    return "general"
+
+def default_shortcut_roots():
+    """Global and per-user Start Menu program folders (empty on machines without them)."""
+    roots = []
+    for var in ("ProgramData", "APPDATA"):
+        base = os.environ.get(var)
+        if base: roots.append(os.path.join(base, "Microsoft", "Windows", "Start Menu", "Programs"))
+    return roots
+
+def default_packages_dir():
+    base = os.environ.get("LOCALAPPDATA")
+    return os.path.join(base, "Packages") if base else None
+
+class ShortcutSource:
+    """Walks Start Menu trees for .lnk files, reusing cached listings of unchanged directories.
+
+    A directory's mtime only changes when direct children are added, removed or renamed, so an
+    unchanged directory is not listed again; only its subdirectories are stat'ed to check them.
+    Per-entry (mtime, size) signatures are kept for files in re-listed directories.
+    """
+    kind = "shortcut"
+
+    def __init__(self, roots=None):
+        self.roots = list(roots) if roots is not None else default_shortcut_roots()
+
+    def scan(self, state):
+        """Returns (entries or None if nothing changed, new state, stats)."""
+        old_dirs = state.get("dirs", {}); old_sigs = state.get("entries", {})
+        dirs = {}; sigs = {}; stats = {"listed": 0, "reused": 0}
+        for root in self.roots: self._walk(root, old_dirs, old_sigs, dirs, sigs, stats)
+        new_state = {"dirs": dirs, "entries": sigs}
+        if not stats["listed"] and dirs.keys() == old_dirs.keys() and sigs == old_sigs:
+            return None, new_state, stats
+        entries = {}
+        for path in sigs:
+            name = os.path.basename(path)[:-4]
+            entries[name.lower()] = {"name": name, "type": self.kind, "path": path, "category": guess_category(name)}
+        return entries, new_state, stats
+
+    def _walk(self, d, old_dirs, old_sigs, dirs, sigs, stats):
+        try: mtime = os.stat(d).st_mtime_ns
+        except OSError: return
+        cached = old_dirs.get(d)
+        if cached and cached["mtime"] == mtime:
+            files, subdirs = cached["files"], cached["subdirs"]; stats["reused"] += 1
+            for f in files:
+                path = os.path.join(d, f)
+                if path in old_sigs: sigs[path] = old_sigs[path]
+        else:
+            files, subdirs = [], []; stats["listed"] += 1
+            try:
+                with os.scandir(d) as it:
+                    for e in it:
+                        try:
+                            if e.is_dir(): subdirs.append(e.name)
+                            elif e.name.lower().endswith(".lnk"):
+                                st = e.stat(); files.append(e.name); sigs[e.path] = [st.st_mtime_ns, st.st_size]
+                        except OSError: continue
+            except OSError: return
+        dirs[d] = {"mtime": mtime, "files": files, "subdirs": subdirs}
+        for sub in subdirs: self._walk(os.path.join(d, sub), old_dirs, old_sigs, dirs, sigs, stats)
+
+def powershell_packages():
+    """Lists (Name, PackageFamilyName) pairs via Get-AppxPackage."""
+    cmd = 'PowerShell "Get-AppxPackage | Select Name, PackageFamilyName"'
+    res = subprocess.check_output(cmd, shell=True).decode('utf-8', errors='ignore')
+    pairs = []
+    for line in res.split('\r\n'):
+        if "  " in line:
+            parts = [p.strip() for p in line.split("  ") if p.strip()]
+            if len(parts) >= 2: pairs.append((parts[0], parts[1]))
+    return pairs
+
+class PackageSource:
+    """Microsoft Store / UWP apps from a package lister (PowerShell by default).
+
+    Listing is the slow part, so it only runs when the per-user Packages folder changed since the
+    last scan; installing or removing a package adds or removes a folder there.
+    """
+    kind = "uwp"
+
+    def __init__(self, lister=powershell_packages, packages_dir=None):
+        self.lister = lister
+        self.packages_dir = packages_dir if packages_dir is not None else default_packages_dir()
+
+    def scan(self, state):
+        stamp = None
+        if self.packages_dir:
+            try: stamp = os.stat(self.packages_dir).st_mtime_ns
+            except OSError: pass
+        if stamp is not None and state.get("stamp") == stamp:
+            return None, state, {"listed": 0, "reused": 1}
+        entries = {}
+        for name, family_name in self.lister():
+            entries[name.lower()] = {"name": name, "type": self.kind, "identity": family_name,
+                                     "path": rf"shell:AppsFolder\{family_name}!App", "category": guess_category(name)}
+        return entries, {"stamp": stamp}, {"listed": 1, "reused": 0}
+
+class IncrementalScanner:
+    """Runs all sources concurrently and turns their results into registry deltas.
+
+    Each source owns the registry entries of its `kind`; a source that reports no change
+    contributes nothing. Scan state (directory mtimes, entry signatures) lives in the "app_scan"
+    store, so a warm start does no listing at all. scan() only stages state changes; the caller
+    writes them with save_state() in the same transaction as the registry delta they produced,
+    so the state can never claim a change the registry does not have.
+    """
+    STORE = "app_scan"
+
+    def __init__(self, sources, storage, legacy_state_path=None):
+        self.sources = list(sources)
+        self.db = storage
+        if legacy_state_path: # Older builds kept the state in its own JSON file
+            self.db.migrate_json(legacy_state_path, lambda state: self.db.put_many(self.STORE, state.items()))
+        self.state = self.db.items(self.STORE)
+        self._staged = {} # kind -> state changed by the last scans, not yet written
+        self.last_stats = {}
+
+    def save_state(self):
+        """Writes the staged state changes; call inside the transaction that stores the scan's delta."""
+        staged, self._staged = self._staged, {}
+        self.db.put_many(self.STORE, staged.items())
+
+    def reset(self):
+        """Forgets all scan state, so the next scan lists everything."""
+        self.state = {}; self._staged = {}
+        self.db.clear(self.STORE) # Forgetting too much is safe: it only costs one full listing
+
+    def _run(self, source):
+        t0 = time.perf_counter()
+        try:
+            entries, new_state, stats = source.scan(self.state.get(source.kind, {}))
+        except Exception as e:
+            print(f"[AppDiscovery] {source.kind} scan error: {e}")
+            return source, None, None, {"error": str(e)}
+        stats["ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        return source, entries, new_state, stats
+
+    def scan(self, apps):
+        """Returns (upserts {key: entry}, removed [keys]) relative to `apps`; does not modify it."""
+        with ThreadPoolExecutor(max_workers=len(self.sources) or 1) as pool:
+            results = list(pool.map(self._run, self.sources))
+        rank = {s.kind: i for i, s in enumerate(self.sources)}
+        upserts = {}; removed = []
+        for source, entries, new_state, stats in results: # Later sources win key collisions
+            self.last_stats[source.kind] = stats
+            if new_state is not None and new_state != self.state.get(source.kind):
+                self.state[source.kind] = self._staged[source.kind] = new_state
+            if entries is None: continue
+            for key, entry in apps.items():
+                if entry.get("type") == source.kind and key not in entries: removed.append(key)
+            for key, entry in entries.items():
+                current = upserts.get(key, apps.get(key))
+                if current and rank.get(current.get("type"), -1) > rank[source.kind]: continue
+                if current != entry: upserts[key] = entry
+        removed = [k for k in removed if k not in upserts]
+        return upserts, removed
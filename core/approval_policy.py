@@ -0,0 +1,67 @@
+import re
+import threading
+import time
+
+from core.storage import open_storage, DEFAULT_DB
+
+NUMBER_RE = re.compile(r"^\d+$")
+
+def step_signature(step):
+    """Lowercase words with bare numbers generalized: "Volume 40" and "volume 65" sign the same.
+
+    Punctuation is kept, so paths and URLs stay distinct ("open c:\\a\\b.exe" is not "open c a b exe").
+    """
+    return " ".join("#" if NUMBER_RE.match(w) else w for w in step.lower().split())
+
+def chain_signature(steps):
+    return " | ".join(s for s in map(step_signature, steps) if s)
+
+class ApprovalPolicy:
+    """Decides which action chains may run without asking, and remembers "Always" answers.
+
+    Chains in `auto_tiers` (SecurityEngine.get_behavior tiers) always run. Other chains run when
+    the same chain signature was approved "always" at the same tier; a chain that now scores a
+    different tier is asked about again. Tiers in `never_tiers` are always asked and never stored.
+    """
+    def __init__(self, storage=None, auto_tiers=("low",), never_tiers=("critical",)):
+        self.db = storage or open_storage(DEFAULT_DB)
+        self.auto_tiers = set(auto_tiers)
+        self.never_tiers = set(never_tiers)
+        self._lock = threading.Lock()
+        self.rules = self.db.items("approval.policy") # "tier:signature" -> {"steps", "approved", "uses"}
+
+    @staticmethod
+    def _key(steps, tier):
+        return f"{tier}:{chain_signature(steps)}"
+
+    def allows(self, steps, tier, partial=False):
+        """True if the chain may run without asking. A `partial` chain (still streaming) is only
+        judged by its tier, since a remembered approval covers a whole chain."""
+        if tier in self.never_tiers: return False
+        if tier in self.auto_tiers: return True
+        if partial: return False
+        key = self._key(steps, tier)
+        with self._lock:
+            rule = self.rules.get(key)
+            if not rule: return False
+            rule = self.rules[key] = {**rule, "uses": rule["uses"] + 1, "last": time.time()}
+        self.db.put("approval.policy", key, rule)
+        return True
+
+    def remember(self, steps, tier):
+        """Stores an "Always" answer; returns False for tiers that may not be pre-approved."""
+        if tier in self.never_tiers or not chain_signature(steps): return False
+        key = self._key(steps, tier)
+        rule = {"steps": [s.strip() for s in steps if s.strip()], "approved": time.time(), "last": None, "uses": 0}
+        with self._lock: self.rules[key] = rule
+        self.db.put("approval.policy", key, rule)
+        return True
+
+    def revoke(self, steps, tier=None):
+        """Forgets the approval of a chain (at every tier unless `tier` is given); returns how many."""
+        sig = chain_signature(steps)
+        with self._lock:
+            keys = [k for k in self.rules if k.split(":", 1)[1] == sig and (tier is None or k.split(":", 1)[0] == tier)]
+            for k in keys: del self.rules[k]
+        for k in keys: self.db.delete("approval.policy", k)
+        return len(keys)
@@ -0,0 +1,68 @@
+import numpy as np
+
+class AudioRingBuffer:
+    """Preallocated capture ring addressed by absolute sample position.
+
+    Every sample is stored twice (at i and i + capacity), so any window of up to `capacity`
+    samples is one contiguous slice: readers get views and memoryviews, never copies.
+    """
+    def __init__(self, capacity, dtype=np.int16):
+        self.capacity = int(capacity)
+        self._data = np.zeros(2 * self.capacity, dtype=dtype)
+        self.written = 0 # Total samples written since the last reset
+
+    def reset(self):
+        self.written = 0
+
+    def write(self, samples):
+        """Copies a block in (the only copy on the capture path). Called from the audio callback."""
+        n = len(samples); cap = self.capacity
+        if n > cap: samples = samples[-cap:]; self.written += n - cap; n = cap
+        pos = self.written % cap
+        first = min(n, cap - pos)
+        self._data[pos:pos + first] = samples[:first]
+        self._data[pos + cap:pos + cap + first] = samples[:first]
+        rest = n - first
+        if rest:
+            self._data[:rest] = samples[first:]
+            self._data[cap:cap + rest] = samples[first:]
+        self.written += n
+
+    def view(self, start, end):
+        """ndarray view of samples [start, end); they must still be inside the ring."""
+        start = max(start, 0)
+        if end - start > self.capacity or start < self.written - self.capacity:
+            raise IndexError("requested audio has already been overwritten")
+        p = start % self.capacity
+        return self._data[p:p + (end - start)]
+
+    def bytes_view(self, start, end):
+        """Byte memoryview over [start, end), e.g. for recognizers that take raw PCM."""
+        return memoryview(self.view(start, end)).cast('B')
+
+class LevelMeter:
+    """Latest audio level (0..1) written by the audio callback, with change notifications.
+
+    The value is a plain float attribute, so readers and the writing callback never take a lock.
+    Subscribers are only called when the level moves by more than `delta`, which keeps UI wakeups
+    proportional to visible change rather than to the audio block rate.
+    """
+    def __init__(self, delta=0.03):
+        self.delta = delta
+        self.value = 0.0
+        self._notified = 0.0
+        self._subscribers = []
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def update(self, level):
+        level = min(1.0, max(0.0, float(level)))
+        self.value = level
+        if abs(level - self._notified) > self.delta or (level == 0.0 and self._notified != 0.0):
+            self._notified = level
+            for cb in self._subscribers: cb(level)
+
+    @staticmethod
+    def rms(block):
+        return float(np.sqrt(np.mean(np.square(block, dtype=np.float64)))) if len(block) else 0.0
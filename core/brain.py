@@ -1,8 +1,8 @@
-import requests
+import concurrent.futures
+import copy
 import json
 import datetime
 import os
-import subprocess
 import webbrowser
 import psutil
 import platform
@@ -15,6 +15,8 @@ from ddgs import DDGS
 from core.memory import Memory
 from core.automation import Automation
 from core.app_discovery import AppDiscovery
+from core.launcher import Launcher
+from core.plan_cache import PlanCache
 from core.workflow import WorkflowManager
 from core.system_ops import SystemController
 from core.monitor import HealthMonitor
@@ -22,6 +24,7 @@ from core.learner import SmartLearner
 from core.skills_manager import SkillsManager
 from core.vision_cortex import VisionCortex
 from core.security import SecurityEngine
+from core.approval_policy import ApprovalPolicy
 from core.biometrics import BiometricEngine
 from core.face_id import FaceEngine
 from core.episodic_memory import EpisodicMemory
@@ -34,60 +37,102 @@ from core.orchestrator import CEOBrain
 from core.reflector import ExperienceReflector
 from core.sysadmin import SysAdmin
 from core.ui_inspector import UIInspector
+from core.specialists import SpecialistRegistry
+from core.llm_client import LLMClient
+from core.streaming import ResponseStream
+from core.chat_context import ChatContext
+from core.prompt_fragments import PromptBuilder, PromptFragment
 from gui.transparency import Action
 
 class Brain:
     def __init__(self, voice_engine, ui_signals=None, task_callback=None):
         self.voice = voice_engine; self.ui_signals = ui_signals; self.task_callback = task_callback
-        self.local_server_url = "http://localhost:1234/v1/chat/completions" 
-        self.models_url = "http://localhost:1234/v1/models"
-        self.use_llm = True; self.current_model = None; self.is_active = True 
+        self.llm = LLMClient("http://localhost:1234/v1")
+        self.local_server_url = self.llm.chat_url; self.models_url = self.llm.models_url
+        self.use_llm = True; self.use_streaming = True; self.current_model = None; self.is_active = True
+        self.use_replay = True # Re-run known plans (taught, corrected or proven) without asking the LLM 
         
-        # Specialists
-        self.memory = Memory(); self.automation = Automation()
-        self.app_discovery = AppDiscovery(); self.workflow_manager = WorkflowManager(self)
-        self.system_ctrl = SystemController(); self.monitor = HealthMonitor(self.alert_system)
-        self.learner = SmartLearner(); self.skills_manager = SkillsManager()
-        self.vision_cortex = VisionCortex(); self.security = SecurityEngine()
-        self.biometrics = BiometricEngine(); self.face_id = FaceEngine()
-        self.episodic = EpisodicMemory(); self.copilot = CodebaseExplorer()
-        self.sandbox = CodeSandbox(); self.researcher = DeepResearcher(self)
-        self.empathy = EmpathyEngine(); self.correction = CorrectionEngine()
-        self.reflector = ExperienceReflector(self); self.sysadmin = SysAdmin()
-        self.ui_inspector = UIInspector(); self.ddgs = DDGS(); self.ceo = CEOBrain(self)
+        # Specialists are built on first use; heavy ones are warmed on a background pool
+        self.specialists = SpecialistRegistry()
+        self._register_specialists()
         
-        self.auth_event = threading.Event(); self.auth_granted = False
+        self.auth_event = threading.Event(); self.auth_granted = False; self.auth_remember = False; self.auth_shown = None; self._live_preview = None; self.stop_event = threading.Event()
         self.user_mood = "Neutral"; self.last_command = None; self.pending_correction = False; self.is_enrolling = False
         
         # Start Monitor
         self.monitor.start(); threading.Thread(target=self.app_discovery.full_scan, daemon=True).start()
+        warming = self.specialists.warm_up()
+        threading.Thread(target=self._report_warm_up, args=(list(warming.values()),), daemon=True).start()
         
-        loaded_history = self.memory.load_history()
-        self.chat_history = loaded_history if loaded_history else [{"role": "system", "content": self._get_system_prompt()}]
+        # Prompt pieces are cached: apps follow the registry version, the screen is refreshed in the background
+        self.prompt = PromptBuilder()
+        self.prompt.add(PromptFragment("apps", lambda: self.app_discovery.get_app_summary(), version_fn=lambda: self.app_discovery.version))
+        self.prompt.add(PromptFragment("screen", lambda: self.vision_cortex.get_context_string(), max_age=15, background=True, fallback=self._get_window_context))
+        
+        # Bounded history; the screen context goes into each user message, not the system prompt
+        self.context = ChatContext(budget=3000)
+        self.context.load(self.memory.load_history())
+        self.context.set_system_prompt(self._get_system_prompt())
         print("[Intent Engine] Full System Integration Online.")
 
+    def _register_specialists(self):
+        reg = self.specialists.register
+        reg("memory", Memory); reg("automation", Automation)
+        reg("app_discovery", AppDiscovery); reg("launcher", lambda: Launcher(self.app_discovery.history))
+        reg("workflow_manager", lambda: WorkflowManager(self))
+        reg("system_ctrl", SystemController); reg("monitor", lambda: HealthMonitor(self.alert_system))
+        reg("learner", lambda: SmartLearner(episodes=self.episodic, on_candidate=self.workflow_manager.add_candidate))
+        reg("skills_manager", SkillsManager)
+        reg("vision_cortex", VisionCortex, heavy=True); reg("security", SecurityEngine)
+        reg("approvals", ApprovalPolicy)
+        reg("biometrics", BiometricEngine); reg("face_id", FaceEngine, heavy=True)
+        reg("episodic", EpisodicMemory, heavy=True); reg("copilot", CodebaseExplorer)
+        reg("sandbox", CodeSandbox); reg("researcher", lambda: DeepResearcher(self))
+        reg("empathy", EmpathyEngine); reg("correction", CorrectionEngine)
+        reg("reflector", lambda: ExperienceReflector(self)); reg("sysadmin", SysAdmin)
+        reg("plan_cache", lambda: PlanCache(self.learner, self.correction, self.episodic, self.app_discovery, security=self.security))
+        reg("ui_inspector", UIInspector); reg("ddgs", DDGS); reg("ceo", lambda: CEOBrain(self))
+        if hasattr(self.voice, "load_stt_model"): reg("stt_model", self.voice.load_stt_model, heavy=True)
+
+    def __getattr__(self, name):
+        # Only reached for attributes not set in __init__, i.e. lazily built specialists
+        specialists = self.__dict__.get("specialists")
+        if specialists is not None and name in specialists: return specialists.get(name)
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
     def check_llm_readiness(self):
-        try:
-            res = requests.get(self.models_url, timeout=2)
-            if res.status_code == 200: return "READY", "Connected"
-        except: pass
-        is_installed = os.path.exists(os.path.join(os.environ["LOCALAPPDATA"], "LM-Studio"))
+        # Cached for a few seconds, so the UI poll and process_command share one probe
+        if self.llm.is_ready(): return "READY", "Connected"
+        is_installed = os.path.exists(os.path.join(os.environ.get("LOCALAPPDATA", ""), "LM-Studio"))
         if is_installed: return "NOT_CONFIGURED", "Server not running on port 1234."
         return "NOT_INSTALLED", "LM Studio not detected."
 
     def _get_system_prompt(self):
-        ctx = self.vision_cortex.get_context_string()
-        apps = self.app_discovery.get_app_summary()
+        """Stable part of the prompt; only changes when the app registry does."""
+        apps = self.prompt.get("apps")
         return f"""
         You are Alex, the CEO-Brain of a high-performance PC AI workstation.
-        CONTEXT: {ctx}
         INSTALLED APPS: {apps}
         PROTOCOL: Use EXECUTE: step1 | step2 for actions.
         """
 
+    def _get_screen_context(self):
+        # Never blocks on OCR: returns the last scan (<15 s old) or the window title while one runs
+        return self.prompt.get("screen")
+
+    def _get_window_context(self):
+        ctx = self.vision_cortex.get_screen_context()
+        return f"Currently focus is on '{ctx['active_window']}'. Visible elements: [scanning]."
+
     def process_command(self, command, audio_raw=None):
         if not command: return
         command = command.lower().strip()
+        if command == "diagnostics": return self._execute_single_command(command)
+
+        # A known plan for (nearly) the same request skips the LLM; it is still previewed for approval
+        if self.use_replay:
+            replay = self._replay_plan(command, audio_raw)
+            if replay: return replay
         
         # Check readiness
         status, _ = self.check_llm_readiness()
@@ -101,8 +146,12 @@ class Brain:
         self._log_to_dashboard("activity", f"Processing: {command}")
 
         if self.use_llm:
-            self.chat_history[0]["content"] = self._get_system_prompt()
-            response = self.query_lm_studio(command)
+            self.context.set_system_prompt(self._get_system_prompt())
+            screen = self._get_screen_context()
+            if self.use_streaming:
+                response = self._process_streaming(command, audio_raw, screen)
+                if response is not None: return response
+            response = self.query_lm_studio(command, screen_context=screen)
             if response:
                 if "EXECUTE:" in response:
                     actions = response.split("EXECUTE:")[1].strip().split("|")
@@ -113,22 +162,102 @@ class Brain:
 
         return self._execute_single_command(command)
 
+    def _process_streaming(self, command, audio_raw, screen=None):
+        """Speaks sentences as they arrive and opens the action preview at the first EXECUTE: step;
+        later steps are added to the open preview.
+
+        Returns None if nothing was received, so the caller can fall back to the blocking query.
+        """
+        def on_step(step):
+            if len(stream.steps) == 1:
+                threading.Thread(target=self._run_action_chain_internal, args=(stream.steps, command, stream.text, audio_raw, stream), daemon=True).start()
+            elif self.ui_signals and self._live_preview and self._live_preview.steps is stream.steps:
+                self.ui_signals.update_preview.emit(self._preview_snapshot(self._live_preview))
+        stream = ResponseStream(on_sentence=self.voice.speak, on_step=on_step)
+        response = self.query_lm_studio_stream(command, stream, screen_context=screen)
+        if response is None and not stream.text: return None
+        return response or stream.text
+
+    def _replay_plan(self, command, audio_raw=None):
+        plan = self.plan_cache.lookup(command)
+        if not plan: return None
+        actions = list(plan.steps)
+        response = "EXECUTE: " + " | ".join(actions)
+        self._log_to_dashboard("activity", f"Replaying {plan.source} plan for '{plan.origin}' (confidence {plan.confidence:.2f})")
+        # A plan borrowed from a similar (not identical) command always goes past the user first
+        similar = plan.source == "episode" and plan.confidence < 1.0
+        origin = f"{plan.origin} ({plan.source} {plan.confidence:.2f})"
+        threading.Thread(target=self._run_action_chain_internal, args=(actions, command, response, audio_raw),
+                         kwargs={"origin": origin, "always_ask": similar}, daemon=True).start()
+        return response
+
     def _is_local_command(self, command):
         """Checks if a command can be executed locally without LLM."""
         local_prefixes = ["open ", "volume ", "lock pc", "click text ", "say "]
-        return any(command.startswith(p) for p in local_prefixes) or command == "lock pc"
+        return any(command.startswith(p) for p in local_prefixes) or command in ("lock pc", "diagnostics")
 
-    def _run_action_chain_internal(self, actions, cmd, full_resp, audio_raw):
+    def _run_action_chain_internal(self, actions, cmd, full_resp, audio_raw, stream=None, origin=None, always_ask=False):
         score = self.security.get_risk_score(actions)
-        action_obj = Action(title=f"Task: {cmd[:20]}", desc=full_resp, tool="Agent Core", risk_score=score, steps=actions)
-        if self.ui_signals:
-            self.auth_event.clear(); self.ui_signals.show_preview.emit(action_obj); self.auth_event.wait()
-            if not self.auth_granted: return
-        self._run_action_chain(action_obj)
+        action_obj = Action(title=f"Task: {cmd[:20]}", desc=full_resp, tool="Agent Core", risk_score=score, steps=actions, origin=origin)
+        tier = self.security.get_behavior(score); remember = False
+        approved = None # Number of steps the user saw when approving
+        asked = None # Tier of the chain when the user was asked
+        if self.ui_signals and (always_ask or not self.approvals.allows(actions, tier, partial=stream is not None)):
+            granted, remember, approved = self._ask_authorization(action_obj, live=stream is not None); asked = tier
+            if not granted: return self._record_plan(cmd, actions, "Rejected", 1)
+        if stream:
+            # The preview opened while the plan was still generating; never run a partial plan
+            stream.wait()
+            if stream.failed: return
+            action_obj.description = stream.text
+            action_obj.risk_score = self.security.get_risk_score(action_obj.steps)
+            tier = self.security.get_behavior(action_obj.risk_score)
+            # The open preview grew with the stream, so one answer normally covers the whole plan. Ask
+            # again only for steps that arrived after the answer, or for a plan that turned critical
+            unseen = approved != len(action_obj.steps) or (tier == "critical" and asked != "critical")
+            if self.ui_signals and unseen and not self.approvals.allows(action_obj.steps, tier):
+                granted, remember, approved = self._ask_authorization(action_obj)
+                if not granted: return self._record_plan(cmd, action_obj.steps, "Rejected", 1)
+        # "Always" covers only a chain the user saw in full
+        if remember and approved == len(action_obj.steps): self.approvals.remember(action_obj.steps, tier)
+        result = self._run_action_chain(action_obj)
+        # Completed plans become replayable; rejected or stopped ones stop being offered
+        if result == "Success": self._record_plan(cmd, action_obj.steps, "Success", 5)
+        elif result == "Stopped": self._record_plan(cmd, action_obj.steps, "Stopped", 2)
+
+    def _ask_authorization(self, action_obj, live=False):
+        """Shows the preview (typed confirmation for critical chains) and waits: (granted, always, steps shown).
+
+        The preview gets snapshots; with `live` (a streaming chain) each new step is sent to the open
+        preview, and the answer covers the steps it showed when the user clicked.
+        """
+        self.auth_event.clear(); self.auth_remember = False; self.auth_shown = None
+        preview = self._preview_snapshot(action_obj)
+        if self.security.get_behavior(preview.risk_score) == "critical":
+            self.ui_signals.show_critical.emit(f"{preview.title}: " + " | ".join(s.strip() for s in preview.steps))
+        else:
+            if live: self._live_preview = action_obj
+            self.ui_signals.show_preview.emit(preview)
+        self.auth_event.wait()
+        self._live_preview = None
+        shown = len(preview.steps) if self.auth_shown is None else self.auth_shown
+        return self.auth_granted, self.auth_granted and self.auth_remember, shown
+
+    def _preview_snapshot(self, action_obj):
+        preview = copy.copy(action_obj); preview.steps = list(action_obj.steps)
+        preview.risk_score = self.security.get_risk_score(preview.steps)
+        return preview
+
+    def _record_plan(self, cmd, steps, outcome, rating):
+        steps = [s.strip() for s in steps if s.strip()]
+        if steps: self.episodic.record_episode(cmd, steps, outcome, rating)
 
     def _run_action_chain(self, action_obj):
-        total = len(action_obj.steps)
+        total = len(action_obj.steps); self.stop_event.clear()
         for i, step in enumerate(action_obj.steps):
+            if self.stop_event.is_set():
+                if self.ui_signals: self.ui_signals.show_result.emit("Task Stopped")
+                return "Stopped"
             step = step.strip()
             self._log_to_dashboard("activity", f"Executing: {step}")
             if self.ui_signals: self.ui_signals.show_live.emit(i+1, total, step, int(((i+1)/total)*100))
@@ -136,6 +265,8 @@ class Brain:
             if self.ui_signals and res: self._log_to_dashboard("data", str(res))
             time.sleep(0.5)
         if self.ui_signals: self.ui_signals.show_result.emit("Task Complete")
+        # The chain changed the screen; start rescanning now instead of on the next command
+        self.prompt.invalidate("screen"); self.prompt.refresh_async("screen")
         return "Success"
 
     def _execute_single_command(self, action):
@@ -148,15 +279,13 @@ class Brain:
 
         if action.startswith("open "):
             target = action.replace("open ","").strip()
-            app = self.app_discovery.find_app(target)
-            if app:
-                path = app["path"]
+            key, app = self.app_discovery.lookup(target)
+            if key:
                 self.voice.speak(f"Opening {app['name']}")
                 try:
-                    cmd = f'powershell -Command "Invoke-Item \'{path}\'"'
-                    subprocess.Popen(cmd, shell=True)
-                    res = f"Launched {app['name']}"; self._log_to_dashboard("files", res); return res
-                except: return "Launch Failed"
+                    ms = self.launcher.launch(key, app)
+                    res = f"Launched {app['name']} ({ms:.0f} ms)"; self._log_to_dashboard("files", res); return res
+                except Exception as e: print(f"[Launcher] {app['name']}: {e}"); return "Launch Failed"
             if "." in target: return self.system_ctrl.open_url(target)
             return "App not found."
 
@@ -175,6 +304,7 @@ class Brain:
 
         if action.startswith("volume "): return self.system_ctrl.set_volume(int(action.split()[1]))
         if action == "lock pc": return self.system_ctrl.lock_pc()
+        if action == "diagnostics": return self._report_diagnostics()
         
         self._log_to_dashboard(cat, f"Action completed: {action}")
         return "Success"
@@ -182,21 +312,48 @@ class Brain:
     def _log_to_dashboard(self, category, text):
         if self.ui_signals: self.ui_signals.log_tab.emit(category, text)
 
-    def set_auth_result(self, val): self.auth_granted = val; self.auth_event.set()
+    def _log_report(self, title, report):
+        self._log_to_dashboard("debugger", f"<b>{title}</b><br>" + report.replace("\n", "<br>"))
+
+    def _report_warm_up(self, futures):
+        concurrent.futures.wait(futures)
+        self._log_report("Specialist init times", self.specialists.get_timings_report())
+
+    def _report_diagnostics(self):
+        """The "diagnostics" command: cache, init and launch counters, logged to the dashboard's debugger tab."""
+        self._log_report("Specialist init times", self.specialists.get_timings_report())
+        self._log_report("Prompt fragment cache", self.prompt.get_metrics_report() or "No fragments built yet.")
+        if hasattr(self.voice, "tts_cache"): self._log_report("TTS cache", self.voice.tts_cache.get_stats_report())
+        self._log_report("Slowest app launches", self.launcher.history.get_slowest_report())
+        return "Diagnostics logged."
+
+    def set_auth_result(self, val, remember=False, shown=None):
+        """Answers the pending preview; remember=True ("Always") pre-approves the same chain at the same risk tier.
+        `shown` is how many steps the preview displayed when answered (default: all it was sent)."""
+        self.auth_granted = val; self.auth_remember = remember; self.auth_shown = shown; self.auth_event.set()
+    def stop(self):
+        """STOP NOW: silences speech and halts the running action chain after the current step."""
+        self.stop_event.set(); self.voice.interrupt()
     def alert_system(self, m): self.voice.speak(m)
-    def get_active_model(self):
-        try:
-            r = requests.get(self.models_url, timeout=2)
-            return r.json()["data"][0]["id"] if r.status_code == 200 else "local-model"
-        except: return "local-model"
-    def query_lm_studio(self, p):
+    def get_active_model(self): return self.llm.get_model()
+    def _build_messages(self, p, screen_context=None):
+        # Volatile context rides on the new user message only, keeping the cached prefix intact
+        return self.context.messages(f"CONTEXT: {screen_context}\n{p}" if screen_context else p)
+    def _remember_turn(self, p, t):
+        self.context.add_turn(p, t); self.memory.save_history(self.context.to_list())
+    def query_lm_studio(self, p, screen_context=None):
+        if not self.current_model: self.current_model = self.get_active_model()
+        t = self.llm.chat(self._build_messages(p, screen_context), model=self.current_model)
+        if t: self._remember_turn(p, t)
+        return t
+    def query_lm_studio_stream(self, p, stream, screen_context=None):
+        """Feeds the streamed reply into `stream` (a ResponseStream) and returns the full text."""
+        if not self.current_model: self.current_model = self.get_active_model()
         try:
-            if not self.current_model: self.current_model = self.get_active_model()
-            r = requests.post(self.local_server_url, json={"model": self.current_model, "messages": self.chat_history + [{"role":"user","content":p}], "temperature": 0.2}, timeout=20)
-            if r.status_code == 200:
-                t = r.json()["choices"][0]["message"]["content"].strip()
-                self.chat_history.append({"role": "user", "content": p})
-                self.chat_history.append({"role": "assistant", "content": t})
-                return t
-            return None
-        except: return None
\ No newline at end of file
+            for delta in self.llm.stream_chat(self._build_messages(p, screen_context), model=self.current_model): stream.feed(delta)
+        except Exception as e:
+            print(f"[LLM] Stream interrupted: {e}"); stream.finish(failed=True); return None
+        stream.finish()
+        t = stream.text.strip()
+        if t: self._remember_turn(p, t)
+        return t or None
\ No newline at end of file
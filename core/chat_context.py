@@ -0,0 +1,96 @@
+SUMMARY_PREFIX = "Summary of the earlier conversation:"
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 chars per token plus per-message overhead), good enough for budgeting."""
+    return (len(text) + 3) // 4 + 4
+
+def _clip(text, limit):
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+def extractive_summary(turns):
+    """Default summarizer: one short line per user/assistant turn, no LLM call."""
+    lines = []
+    for user, assistant in turns:
+        lines.append(f"- User: {_clip(user, 80)} -> Alex: {_clip(assistant, 100)}")
+    return lines
+
+class ChatContext:
+    """Token-budgeted chat history: system prompt + rolling summary + recent turns.
+
+    The system message is kept byte-stable (volatile context belongs in the user message) and the
+    summary only changes when a compaction happens, so server-side prompt caching keeps hitting.
+    When the estimate exceeds `budget`, the oldest turns are folded into the summary until the
+    total is back under `budget * low_water`.
+    """
+    def __init__(self, system_prompt="", budget=3000, summary_budget=400, keep_recent=4, low_water=0.75, summarizer=extractive_summary):
+        self.budget = budget
+        self.summary_budget = summary_budget
+        self.keep_recent = keep_recent
+        self.low_water = low_water
+        self.summarizer = summarizer
+        self.system_prompt = ""; self.system_tokens = 0
+        self.summary_lines = []; self.summary_tokens = 0
+        self.turns = [] # [(message, tokens)]
+        self.set_system_prompt(system_prompt)
+
+    def set_system_prompt(self, text):
+        if text == self.system_prompt: return False
+        self.system_prompt = text; self.system_tokens = estimate_tokens(text)
+        return True
+
+    @property
+    def total_tokens(self):
+        return self.system_tokens + self.summary_tokens + sum(t for _, t in self.turns)
+
+    def add_turn(self, user_text, assistant_text):
+        for role, content in (("user", user_text), ("assistant", assistant_text)):
+            self.turns.append(({"role": role, "content": content}, estimate_tokens(content)))
+        if self.total_tokens > self.budget: self.compact()
+
+    def compact(self):
+        """Folds the oldest turns into the summary until the history is under the low-water mark."""
+        target = int(self.budget * self.low_water)
+        folded = []
+        while self.total_tokens > target and len(self.turns) > self.keep_recent * 2:
+            msg, _ = self.turns.pop(0)
+            if msg["role"] == "user" and self.turns and self.turns[0][0]["role"] == "assistant":
+                reply, _ = self.turns.pop(0)
+                folded.append((msg["content"], reply["content"]))
+            else:
+                folded.append((msg["content"], ""))
+        if not folded: return
+        self.summary_lines.extend(self.summarizer(folded))
+        # The summary itself is capped; the oldest lines go first
+        while len(self.summary_lines) > 1 and estimate_tokens("\n".join(self.summary_lines)) > self.summary_budget:
+            self.summary_lines.pop(0)
+        self.summary_tokens = estimate_tokens(self._summary_text()) if self.summary_lines else 0
+        print(f"[Context] Compacted {len(folded)} turns; history now ~{self.total_tokens} tokens.")
+
+    def _summary_text(self):
+        return SUMMARY_PREFIX + "\n" + "\n".join(self.summary_lines)
+
+    def messages(self, user_text=None):
+        """Returns the message list to send, optionally ending with a new user message."""
+        msgs = [{"role": "system", "content": self.system_prompt}]
+        if self.summary_lines: msgs.append({"role": "system", "content": self._summary_text()})
+        msgs.extend(m for m, _ in self.turns)
+        if user_text is not None: msgs.append({"role": "user", "content": user_text})
+        return msgs
+
+    def to_list(self):
+        """Serializable history (summary + turns). The system prompt is rebuilt at startup."""
+        return self.messages()[1:]
+
+    def load(self, history):
+        """Restores a saved history. Accepts the legacy format that started with a system prompt."""
+        self.summary_lines = []; self.turns = []
+        for msg in history or []:
+            content = msg.get("content", "")
+            if msg.get("role") == "system":
+                if content.startswith(SUMMARY_PREFIX):
+                    self.summary_lines = [l for l in content[len(SUMMARY_PREFIX):].split("\n") if l.strip()]
+                continue
+            self.turns.append(({"role": msg["role"], "content": content}, estimate_tokens(content)))
+        self.summary_tokens = estimate_tokens(self._summary_text()) if self.summary_lines else 0
+        if self.total_tokens > self.budget: self.compact()
@@ -1,20 +1,21 @@
-import json
-import os
+from core.storage import open_storage, DEFAULT_DB
 
 SKILLS_GRAPH = "data/skills_graph.json"
 
 class CorrectionEngine:
-    def __init__(self):
+    def __init__(self, storage=None):
+        self.db = storage or open_storage(DEFAULT_DB)
+        self.db.migrate_json(SKILLS_GRAPH, self._import_json)
         self.graph = self._load_graph()
+        self.revision = 0 # Bumped on every change, so caches of derived plans can tell
+
+    def _import_json(self, data):
+        self.db.put_many("correction.corrections", data.get("corrections", {}).items())
+        self.db.put_many("correction.success_patterns", data.get("success_patterns", {}).items())
 
     def _load_data(self):
-        if not os.path.exists(SKILLS_GRAPH):
-            default = {"corrections": {}, "success_patterns": {}}
-            with open(SKILLS_GRAPH, 'w') as f: json.dump(default, f)
-            return default
-        try:
-            with open(SKILLS_GRAPH, 'r') as f: return json.load(f)
-        except: return {"corrections": {}, "success_patterns": {}}
+        return {"corrections": self.db.items("correction.corrections"),
+                "success_patterns": self.db.items("correction.success_patterns")}
 
     def _load_graph(self):
         return self._load_data()
@@ -22,15 +23,12 @@ class CorrectionEngine:
     def learn_from_correction(self, failed_intent, corrected_action):
         """Remembers that 'failed_intent' should actually be 'corrected_action'."""
         self.graph["corrections"][failed_intent.lower()] = corrected_action.lower()
-        self._save()
+        self.revision += 1
+        self.db.put("correction.corrections", failed_intent.lower(), corrected_action.lower())
 
     def get_optimized_action(self, intent):
         return self.graph["corrections"].get(intent.lower())
 
-    def _save(self):
-        with open(SKILLS_GRAPH, 'w') as f:
-            json.dump(self.graph, f, indent=2)
-
     def summarize_learnings(self):
         count = len(self.graph["corrections"])
         if count == 0: return "System has not needed corrections yet."
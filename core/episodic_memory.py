@@ -1,18 +1,56 @@
-import json
-import os
+import collections
 import time
 
+from core.plan_cache import parse_plan
+from core.storage import open_storage, DEFAULT_DB
+from core.vector_index import HashedVectorizer, VectorIndex, arguments, index_terms, normalize, same_verb, verb
+
 EPISODES_FILE = "data/episodes.json"
 
+def plan_steps(actions):
+    """Replayable steps of an episode: a list as is, an "EXECUTE: a | b" string parsed, anything
+    else (a free-form plan) none."""
+    if isinstance(actions, list): return actions
+    if isinstance(actions, str) and actions.strip().lower().startswith("execute:"): return parse_plan(actions)
+    return []
+
 class EpisodicMemory:
-    def __init__(self):
-        self.episodes = self._load_data()
+    def __init__(self, storage=None, max_episodes=50000, min_rating=4):
+        self.db = storage or open_storage(DEFAULT_DB)
+        self.max_episodes = max_episodes
+        self.min_rating = min_rating # Only plans rated at least this high are offered for replay
+        self.vectorizer = HashedVectorizer()
+        self.index = VectorIndex(self.vectorizer.dim)
+        self.plans = {} # normalized command -> latest good episode
+        self._rating_sum = 0
+        self.revision = 0 # Bumped on every recorded episode, so caches of derived plans can tell
+        self._listeners = []
+        self.db.migrate_json(EPISODES_FILE, self._import_json)
+        self.episodes = collections.deque(maxlen=max_episodes)
+        # Replay the log first and vectorize only the plans that survive it: most commands repeat,
+        # so this indexes each distinct command once instead of once per episode
+        for ep in self._load_data(): self._remember(ep, index=False)
+        for key in self.plans: self.index.add(key, self.vectorizer.transform(key), index_terms(key))
+
+    def _import_json(self, episodes):
+        for ep in episodes[-self.max_episodes:]: self.db.append("episodes", ep)
 
     def _load_data(self):
-        if not os.path.exists(EPISODES_FILE): return []
-        try:
-            with open(EPISODES_FILE, 'r') as f: return json.load(f)
-        except: return []
+        return self.db.tail("episodes", self.max_episodes)
+
+    def _remember(self, episode, index=True):
+        if len(self.episodes) == self.episodes.maxlen: self._rating_sum -= self.episodes[0]["rating"]
+        self.episodes.append(episode); self._rating_sum += episode["rating"]
+        key = normalize(episode["command"])
+        good = episode["rating"] >= self.min_rating
+        steps = plan_steps(episode["actions"]) if good else []
+        if steps:
+            self.plans[key] = {**episode, "actions": steps} if steps is not episode["actions"] else episode
+            if index: self.index.add(key, self.vectorizer.transform(key), index_terms(key))
+        elif not good and key in self.plans:
+            # The latest attempt went badly; stop replaying the old plan
+            del self.plans[key]
+            if index: self.index.remove(key)
 
     def record_episode(self, command, actions, outcome, rating=5):
         """Records a completed task and its quality."""
@@ -23,25 +61,39 @@ class EpisodicMemory:
             "outcome": outcome,
             "rating": rating # 1-5
         }
-        self.episodes.append(episode)
-        # Keep last 100 episodes
-        if len(self.episodes) > 100: self.episodes.pop(0)
-        self._save()
+        self._remember(episode); self.revision += 1
+        self.db.append("episodes", episode, cap=self.max_episodes)
+        for callback in self._listeners: callback(episode)
 
-    def _save(self):
-        with open(EPISODES_FILE, 'w') as f:
-            json.dump(self.episodes, f, indent=2)
+    def subscribe(self, callback):
+        """callback(episode) runs after every recorded episode; used by incremental miners."""
+        self._listeners.append(callback)
 
-    def find_similar_experience(self, current_command):
-        """Looks for a past successful execution of a similar command."""
-        # Simple match for now
-        for ep in reversed(self.episodes):
-            if ep["command"] == current_command and ep["rating"] >= 4:
-                return ep["actions"]
+    def find_similar(self, command, min_score=0.85, shortlist=5):
+        """(similarity, episode) for the closest proven plan, or None.
+
+        Filler words are ignored, so "open spotify please" matches "open spotify" exactly (1.0).
+        Otherwise the vector score only shortlists: a match must have the same verb (or a listed
+        synonym) and act on the same arguments (every word after the verb), so "launch spotify" can
+        reuse "open spotify" but "open budget 2024" never reuses "open budget 2023", and "open X"
+        never reuses "delete X".
+        """
+        key = normalize(command)
+        if key in self.plans: return 1.0, self.plans[key]
+        args = arguments(key)
+        if not args: return None # A one-word command that is not an exact match is a different command
+        hits = self.index.search(self.vectorizer.transform(key), k=shortlist, min_score=min_score, terms=index_terms(key))
+        for score, other in hits:
+            if arguments(other) == args and same_verb(verb(other), verb(key)): return score, self.plans[other]
         return None
 
+    def find_similar_experience(self, current_command, min_score=0.85):
+        """Looks for a past successful execution of a similar command."""
+        match = self.find_similar(current_command, min_score)
+        return match[1]["actions"] if match else None
+
     def get_performance_summary(self):
         total = len(self.episodes)
         if total == 0: return "No tasks recorded yet."
-        avg = sum([e["rating"] for e in self.episodes]) / total
+        avg = self._rating_sum / total
         return f"Processed {total} tasks with an efficiency rating of {avg:.1f}/5.0."
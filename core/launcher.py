@@ -0,0 +1,71 @@
+import math
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from core.storage import open_storage, DEFAULT_DB
+
+class LaunchHistory:
+    """Per-app launch counts, recency and spawn latency, one stored record per app.
+
+    `boost(key)` is a frecency bonus in [0, max_boost]: log-scaled launch count, decayed by a
+    half-life since the last launch, so apps the user opens often rank above lookalikes.
+    """
+    def __init__(self, storage=None, half_life_days=14.0, max_boost=0.15):
+        self.db = storage or open_storage(DEFAULT_DB)
+        self.half_life = half_life_days * 86400
+        self.max_boost = max_boost
+        self._lock = threading.Lock()
+        self.apps = self.db.items("launch_history") # key -> {"count", "last", "avg_ms", "max_ms", "last_ms"}
+
+    def record(self, key, latency_ms, now=None):
+        now = now or time.time()
+        with self._lock:
+            s = dict(self.apps.get(key) or {"count": 0, "last": 0, "avg_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0})
+            s["count"] += 1; s["last"] = now
+            s["last_ms"] = round(latency_ms, 1); s["max_ms"] = round(max(s["max_ms"], latency_ms), 1)
+            s["avg_ms"] = round(s["avg_ms"] + (latency_ms - s["avg_ms"]) / s["count"], 1)
+            self.apps[key] = s
+        self.db.put("launch_history", key, s)
+
+    def boost(self, key, now=None):
+        s = self.apps.get(key)
+        if not s: return 0.0
+        age = max(0.0, (now or time.time()) - s["last"])
+        decay = 0.5 ** (age / self.half_life)
+        return self.max_boost * min(1.0, math.log1p(s["count"]) / math.log1p(50)) * decay
+
+    def slowest(self, n=5):
+        """[(key, avg_ms, max_ms)] for the apps that take longest to spawn."""
+        rows = [(k, s["avg_ms"], s["max_ms"]) for k, s in self.apps.items()]
+        return sorted(rows, key=lambda r: r[1], reverse=True)[:n]
+
+    def get_slowest_report(self, n=5):
+        rows = self.slowest(n)
+        if not rows: return "No launches recorded yet."
+        return "\n".join(f"- {k}: {avg:.0f} ms avg, {mx:.0f} ms max" for k, avg, mx in rows)
+
+def shell_open(path):
+    """Default backend: ShellExecute on Windows (handles .lnk and shell:AppsFolder targets), else xdg-open."""
+    if hasattr(os, "startfile"): os.startfile(path)
+    else: subprocess.Popen(["open" if sys.platform == "darwin" else "xdg-open", path],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+
+class Launcher:
+    """Starts registry entries through a pluggable backend and records each launch.
+
+    backend(path) must start the target and return once it has been handed to the OS; the time
+    it takes is the recorded launch latency.
+    """
+    def __init__(self, history=None, backend=shell_open):
+        self.history = history
+        self.backend = backend
+
+    def launch(self, key, app):
+        t0 = time.perf_counter()
+        self.backend(app["path"])
+        latency = (time.perf_counter() - t0) * 1000
+        if self.history: self.history.record(key, latency)
+        return latency
@@ -1,29 +1,44 @@
-import json
-import os
+from core.sequence_miner import SequenceMiner
+from core.storage import open_storage, DEFAULT_DB
+from core.vector_index import normalize
 
 LEARNED_DATA = "data/learned.json"
 
 class SmartLearner:
-    def __init__(self):
+    def __init__(self, storage=None, episodes=None, on_candidate=None, min_rating=4):
+        self.db = storage or open_storage(DEFAULT_DB)
+        self.db.migrate_json(LEARNED_DATA, self._import_json)
         self.data = self._load_data()
+        self.revision = 0 # Bumped on every change, so caches of derived plans can tell
+        # Routines are mined from successful episodes as they are recorded; on_candidate(steps, count)
+        # hears about each new one. The backlog is replayed once here, never rescanned.
+        self.min_rating = min_rating
+        self.miner = SequenceMiner(on_candidate=on_candidate)
+        if episodes is not None:
+            for ep in episodes.episodes: self.observe_episode(ep)
+            episodes.subscribe(self.observe_episode)
+
+    def _import_json(self, data):
+        self.db.put_many("learner.mappings", data.get("mappings", {}).items())
+        self.db.put("learner", "patterns", data.get("patterns", []))
+        for cmd in data.get("failed_commands", [])[-50:]: self.db.append("learner.failed", cmd)
 
     def _load_data(self):
-        if not os.path.exists(LEARNED_DATA):
-            default = {"mappings": {}, "patterns": [], "failed_commands": []}
-            with open(LEARNED_DATA, 'w') as f: json.dump(default, f)
-            return default
-        try:
-            with open(LEARNED_DATA, 'r') as f: return json.load(f)
-        except: return {"mappings": {}, "patterns": [], "failed_commands": []}
+        return {"mappings": self.db.items("learner.mappings"),
+                "patterns": self.db.get("learner", "patterns", []),
+                "failed_commands": self.db.tail("learner.failed", 50)}
 
     def save(self):
-        with open(LEARNED_DATA, 'w') as f:
-            json.dump(self.data, f, indent=2)
+        """Writes the whole in-memory state; the mutators below persist only what they change."""
+        with self.db.transaction():
+            self.db.put_many("learner.mappings", self.data["mappings"].items())
+            self.db.put("learner", "patterns", self.data["patterns"])
 
     def learn_mapping(self, natural_phrase, command):
         """Learns that 'phrase' actually means 'command'."""
         self.data["mappings"][natural_phrase.lower()] = command.lower()
-        self.save()
+        self.revision += 1
+        self.db.put("learner.mappings", natural_phrase.lower(), command.lower())
 
     def get_mapped_command(self, phrase):
         return self.data["mappings"].get(phrase.lower())
@@ -32,13 +47,14 @@ class SmartLearner:
         self.data["failed_commands"].append(command)
         if len(self.data["failed_commands"]) > 50:
             self.data["failed_commands"].pop(0)
-        self.save()
+        self.db.append("learner.failed", command, cap=50)
+
+    def observe_episode(self, episode):
+        if episode["rating"] >= self.min_rating:
+            self.miner.observe(normalize(episode["command"]), episode["timestamp"])
 
     def suggest_automation(self, recent_history):
-        """Analyzes history for repeated sequences."""
-        # Simple implementation: look for the same commands in order
+        """The mined routine that the last commands in `recent_history` begin, as a list of commands, or None."""
         if len(recent_history) < 3: return None
-        
-        # Logic to find if same 3 apps opened frequently
-        # For now, placeholder for real pattern matching
-        return None
+        found = self.miner.continuations([normalize(c) for c in recent_history])
+        return found[0][0] if found else None
@@ -0,0 +1,149 @@
+import json
+import queue
+import threading
+import time
+import wave
+import numpy as np
+
+from core.audio_buffer import AudioRingBuffer
+
+class EnergyVAD:
+    """RMS voice activity detector with an adaptive noise floor (int16 audio)."""
+    def __init__(self, min_threshold=300.0, ratio=3.0, adapt=0.05):
+        self.min_threshold = min_threshold
+        self.ratio = ratio     # Speech must be this many times louder than the noise floor
+        self.adapt = adapt     # How fast the floor follows non-speech blocks
+        self.noise_floor = min_threshold / ratio
+
+    @staticmethod
+    def rms(chunk):
+        return float(np.sqrt(np.mean(np.square(chunk, dtype=np.float64)))) if len(chunk) else 0.0
+
+    def is_speech(self, chunk):
+        level = self.rms(chunk)
+        speech = level > max(self.min_threshold, self.noise_floor * self.ratio)
+        if not speech: self.noise_floor += (level - self.noise_floor) * self.adapt
+        return speech
+
+class StreamingListener:
+    """Feeds microphone blocks to a Vosk recognizer as they arrive and stops on trailing silence.
+
+    Capture goes into a preallocated AudioRingBuffer; the callback only copies each block into it
+    and posts the new write position. Recognition starts `preroll` seconds before speech onset,
+    so the first syllable is not lost and silence before it is never decoded.
+
+    stream_factory must accept sounddevice.InputStream's keyword arguments (samplerate, channels,
+    dtype, blocksize, callback) and return a context manager; see WavInputStream for a fake.
+    """
+    def __init__(self, recognizer, stream_factory, samplerate=16000, block_ms=30, vad=None,
+                 max_wait=5.0, max_utterance=15.0, trailing_silence=0.8, preroll=0.3,
+                 on_partial=None, on_speech_start=None, on_level=None):
+        self.recognizer = recognizer
+        self.stream_factory = stream_factory
+        self.samplerate = samplerate
+        self.blocksize = int(samplerate * block_ms / 1000)
+        self.vad = vad or EnergyVAD()
+        self.max_wait = max_wait                 # Give up if nobody starts talking
+        self.max_utterance = max_utterance       # Hard cap once speech started
+        self.trailing_silence = trailing_silence # Silence that ends an utterance
+        self.preroll = int(preroll * samplerate)
+        self.on_partial = on_partial; self.on_speech_start = on_speech_start; self.on_level = on_level
+        # Room for a full utterance plus pre-roll and some slack for a slow consumer
+        self.ring = AudioRingBuffer(int((max_utterance + preroll + 2.0) * samplerate))
+        self._zero_copy = True
+
+    def _accept(self, start, end):
+        if self._zero_copy:
+            try: return self.recognizer.AcceptWaveform(self.ring.bytes_view(start, end))
+            except TypeError: self._zero_copy = False # This binding only takes bytes
+        return self.recognizer.AcceptWaveform(self.ring.bytes_view(start, end).tobytes())
+
+    def listen(self):
+        """Returns (text, int16 audio) for one utterance, or (None, None).
+
+        The audio is copied out of the ring buffer once the utterance ends (one copy per
+        utterance), so callers may keep it while the next listen() reuses the buffer.
+        """
+        ring = self.ring; ring.reset()
+        positions = queue.SimpleQueue()
+        def callback(indata, frames, time_info, status):
+            ring.write(indata[:, 0] if indata.ndim > 1 else indata)
+            positions.put(ring.written)
+
+        texts = []; last_partial = ""
+        onset = None; fed = 0; last_voice = 0; read = 0
+        start = time.monotonic(); sr = self.samplerate
+        with self.stream_factory(samplerate=sr, channels=1, dtype='int16', blocksize=self.blocksize, callback=callback):
+            while True:
+                try: end = positions.get(timeout=1.0)
+                except queue.Empty:
+                    if time.monotonic() - start > self.max_wait + self.max_utterance: break
+                    continue
+                # A consumer that stalled for longer than the ring's slack skips the lost audio
+                oldest = ring.written - ring.capacity + self.blocksize
+                if read < oldest: read = oldest; fed = max(fed, oldest)
+                if end <= read: continue
+                chunk = ring.view(read, end)
+                if self.on_level: self.on_level(self.vad.rms(chunk) / 3000)
+                if self.vad.is_speech(chunk):
+                    if onset is None:
+                        onset = read; fed = max(0, read - self.preroll, end - ring.capacity)
+                        if self.on_speech_start: self.on_speech_start()
+                    last_voice = end
+                read = end
+
+                if onset is not None:
+                    done = self._accept(fed, end); fed = end
+                    if done:
+                        seg = json.loads(self.recognizer.Result()).get("text", "")
+                        if seg: texts.append(seg)
+                    else:
+                        partial = json.loads(self.recognizer.PartialResult()).get("partial", "")
+                        if partial and partial != last_partial:
+                            last_partial = partial
+                            if self.on_partial: self.on_partial(" ".join(texts + [partial]))
+
+                if onset is None:
+                    if end > self.max_wait * sr: break
+                elif end - last_voice >= self.trailing_silence * sr or end - onset >= self.max_utterance * sr:
+                    break
+        if self.on_level: self.on_level(0.0)
+
+        final = json.loads(self.recognizer.FinalResult()).get("text", "") # Also resets the recognizer
+        if final: texts.append(final)
+        text = " ".join(texts).strip()
+        if onset is None or not text: return None, None
+        return text, np.array(ring.view(max(0, onset - self.preroll, read - ring.capacity), read)) # Owned copy
+
+class WavInputStream:
+    """Stand-in for sounddevice.InputStream that plays a mono 16-bit WAV file into the callback.
+
+    After the file ends it keeps delivering silence, like a quiet microphone. `speed` is a multiple
+    of real time (1.0 paces blocks like a real device).
+    """
+    def __init__(self, path, samplerate=16000, channels=1, dtype='int16', blocksize=480, callback=None, speed=20.0):
+        with wave.open(path, 'rb') as w:
+            if w.getsampwidth() != 2 or w.getnchannels() != 1: raise ValueError("WavInputStream needs mono 16-bit PCM")
+            if w.getframerate() != samplerate: raise ValueError(f"WAV is {w.getframerate()} Hz, expected {samplerate}")
+            self.audio = np.frombuffer(w.readframes(w.getnframes()), dtype=np.int16)
+        self.samplerate = samplerate; self.blocksize = blocksize; self.callback = callback; self.speed = speed
+        self._stop = threading.Event(); self._thread = None
+
+    @classmethod
+    def factory(cls, path, speed=20.0):
+        return lambda **kwargs: cls(path, speed=speed, **kwargs)
+
+    def _run(self):
+        pos = 0; silence = np.zeros(self.blocksize, dtype=np.int16)
+        while not self._stop.is_set():
+            block = self.audio[pos:pos + self.blocksize]; pos += self.blocksize
+            if len(block) < self.blocksize: block = np.concatenate([block, silence[:self.blocksize - len(block)]])
+            self.callback(block.reshape(-1, 1), self.blocksize, None, None)
+            time.sleep(self.blocksize / self.samplerate / self.speed)
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, daemon=True); self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set(); self._thread.join(timeout=1)
@@ -0,0 +1,90 @@
+import json
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+class LLMClient:
+    """Keep-alive client for an OpenAI-compatible server (LM Studio by default)."""
+    def __init__(self, base_url="http://localhost:1234/v1", connect_timeout=2, read_timeout=20, status_ttl=10, pool_size=4):
+        self.base_url = base_url.rstrip("/")
+        self.chat_url = f"{self.base_url}/chat/completions"
+        self.models_url = f"{self.base_url}/models"
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.status_ttl = status_ttl
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter); self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self._status = None # (ready, model_id, checked_at)
+
+    def _probe(self):
+        try:
+            r = self.session.get(self.models_url, timeout=(self.connect_timeout, self.connect_timeout))
+            if r.status_code == 200:
+                data = r.json().get("data") or []
+                return True, data[0]["id"] if data else None
+        except (requests.RequestException, ValueError, KeyError): pass
+        return False, None
+
+    def get_status(self, force=False):
+        """Returns (ready, model_id), probing /models at most once per status_ttl seconds."""
+        with self._lock:
+            cached = self._status
+            if not force and cached and time.monotonic() - cached[2] < self.status_ttl:
+                return cached[0], cached[1]
+            ready, model = self._probe()
+            self._status = (ready, model, time.monotonic())
+            return ready, model
+
+    def invalidate_status(self):
+        with self._lock: self._status = None
+
+    def is_ready(self):
+        return self.get_status()[0]
+
+    def get_model(self, default="local-model"):
+        return self.get_status()[1] or default
+
+    def chat(self, messages, model=None, temperature=0.2, **extra):
+        """Sends a chat completion and returns the reply text, or None on failure."""
+        payload = {"model": model or self.get_model(), "messages": messages, "temperature": temperature}
+        payload.update(extra)
+        try:
+            r = self.session.post(self.chat_url, json=payload, timeout=(self.connect_timeout, self.read_timeout))
+        except requests.RequestException as e:
+            print(f"[LLM] Request failed: {e}")
+            # The server went away; make the next readiness check hit the network
+            self.invalidate_status(); return None
+        if r.status_code != 200:
+            print(f"[LLM] Server returned {r.status_code}")
+            return None
+        try: return r.json()["choices"][0]["message"]["content"].strip()
+        except (ValueError, KeyError, IndexError): return None
+
+    def stream_chat(self, messages, model=None, temperature=0.2, **extra):
+        """Yields reply text deltas from the server's SSE stream (stream: true).
+
+        Raises requests.RequestException if the connection fails, so callers can fall back to chat().
+        """
+        payload = {"model": model or self.get_model(), "messages": messages, "temperature": temperature, "stream": True}
+        payload.update(extra)
+        try:
+            r = self.session.post(self.chat_url, json=payload, timeout=(self.connect_timeout, self.read_timeout), stream=True)
+            r.raise_for_status()
+        except requests.RequestException:
+            self.invalidate_status(); raise
+        with r:
+            for line in r.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"): continue
+                data = line[5:].strip()
+                if data == "[DONE]": break
+                try: delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+                except (ValueError, KeyError, IndexError): continue
+                if delta: yield delta
+
+    def close(self):
+        self.session.close()
@@ -1,48 +1,34 @@
-import json
 import os
 
+from core.storage import open_storage, DEFAULT_DB
+
 DATA_DIR = "data"
 HISTORY_FILE = os.path.join(DATA_DIR, "history.json")
 FACTS_FILE = os.path.join(DATA_DIR, "facts.json")
 
 class Memory:
-    def __init__(self):
-        self._ensure_files()
+    def __init__(self, storage=None):
+        self.db = storage or open_storage(DEFAULT_DB)
+        self._migrate()
 
-    def _ensure_files(self):
-        if not os.path.exists(DATA_DIR):
-            os.makedirs(DATA_DIR)
-        if not os.path.exists(HISTORY_FILE):
-            with open(HISTORY_FILE, 'w') as f: json.dump([], f)
-        if not os.path.exists(FACTS_FILE):
-            with open(FACTS_FILE, 'w') as f: json.dump([], f)
+    def _migrate(self):
+        # One-time import of the JSON files used before the SQLite store
+        self.db.migrate_json(HISTORY_FILE, lambda history: self.db.put("memory", "history", history))
+        self.db.migrate_json(FACTS_FILE, lambda facts: self.db.put_many("facts", ((f, True) for f in facts)))
 
     def load_history(self):
-        try:
-            with open(HISTORY_FILE, 'r') as f:
-                return json.load(f)
-        except:
-            return []
+        return self.db.get("memory", "history", [])
 
     def save_history(self, history):
-        # Keep only last 20 messages to prevent infinite growth
-        trimmed = history[-20:] if len(history) > 20 else history
-        with open(HISTORY_FILE, 'w') as f:
-            json.dump(trimmed, f, indent=2)
+        # The Brain's ChatContext keeps the history within its token budget
+        self.db.put("memory", "history", history)
 
     def load_facts(self):
-        try:
-            with open(FACTS_FILE, 'r') as f:
-                return json.load(f)
-        except:
-            return []
+        return list(self.db.items("facts"))
 
     def add_fact(self, fact_text):
-        facts = self.load_facts()
-        if fact_text not in facts:
-            facts.append(fact_text)
-            with open(FACTS_FILE, 'w') as f:
-                json.dump(facts, f, indent=2)
+        if self.db.get("facts", fact_text) is None:
+            self.db.put("facts", fact_text, True)
             return True
         return False
 
@@ -0,0 +1,172 @@
+import math
+import threading
+import time
+import numpy as np
+from PIL import Image
+
+def _box_rect(box):
+    xs = [p[0] for p in box]; ys = [p[1] for p in box]
+    return min(xs), min(ys), max(xs), max(ys)
+
+def _intersects(a, b):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+def _contains(outer, inner):
+    return outer[0] <= inner[0] and outer[1] <= inner[1] and inner[2] <= outer[2] and inner[3] <= outer[3]
+
+def _merge_rects(rects):
+    """Merges overlapping (x0, y0, x1, y1) rectangles until none overlap."""
+    rects = list(rects); merged = True
+    while merged:
+        merged = False
+        for i in range(len(rects)):
+            for j in range(i + 1, len(rects)):
+                if _intersects(rects[i], rects[j]):
+                    a, b = rects[i], rects.pop(j)
+                    rects[i] = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+                    merged = True; break
+            if merged: break
+    return rects
+
+def _format(results, scale=1.0):
+    # Format: [{"text": "...", "box": [[x,y], ...], "confidence": 0.9}] with boxes mapped back to full resolution
+    return [{"text": text, "box": [[int(p[0] / scale), int(p[1] / scale)] for p in bbox], "confidence": float(prob)}
+            for (bbox, text, prob) in results]
+
+def read_blocks(reader, img, max_side=None, two_stage=False, min_box=8):
+    """Runs an EasyOCR reader on `img` and returns text blocks in `img` coordinates.
+
+    max_side: downscale so the longest side is at most this many pixels (coordinates are mapped back).
+    two_stage: detect text boxes on the downscaled image, then recognize only those boxes on the
+    full-resolution grayscale image, so small text stays legible.
+    """
+    h, w = img.shape[:2]
+    scale = min(1.0, max_side / max(h, w)) if max_side else 1.0
+    if scale >= 1.0: return _format(reader.readtext(img))
+    small = np.asarray(Image.fromarray(img).resize((max(1, int(w * scale)), max(1, int(h * scale))), Image.BILINEAR))
+    if not two_stage: return _format(reader.readtext(small), scale)
+
+    horizontal, free = reader.detect(small)
+    horizontal = [[int(x0 / scale), int(x1 / scale), int(y0 / scale), int(y1 / scale)] for x0, x1, y0, y1 in horizontal[0]]
+    horizontal = [b for b in horizontal if b[1] - b[0] >= min_box and b[3] - b[2] >= min_box]
+    free = [[[int(x / scale), int(y / scale)] for x, y in poly] for poly in free[0]]
+    if not horizontal and not free: return []
+    gray = np.asarray(Image.fromarray(img).convert("L"))
+    return _format(reader.recognize(gray, horizontal_list=horizontal, free_list=free))
+
+class IncrementalOCR:
+    """Keeps the last frame and its text blocks; re-runs recognition only where tiles changed.
+
+    `recognize(img)` must return [{"text", "box", "confidence"}] in the coordinates of `img`.
+    """
+    def __init__(self, recognize, tile=128, margin=16, full_threshold=0.5):
+        self.recognize = recognize
+        self.tile = tile
+        self.margin = margin
+        self.full_threshold = full_threshold # Above this share of changed tiles, just redo the frame
+        self.last_frame = None
+        self.blocks = []
+        self.frame_id = 0 # Bumped whenever the block list changes
+        self._lock = threading.Lock()
+        self.stats = {"frames": 0, "full_passes": 0, "partial_passes": 0, "unchanged": 0, "regions": 0, "last_ms": 0.0}
+
+    def reset(self):
+        with self._lock: self.last_frame = None; self.blocks = []
+
+    def changed_tiles(self, frame):
+        """Boolean (rows, cols) grid of tiles that differ from the last frame."""
+        t = self.tile; h, w = frame.shape[:2]
+        ch = frame.shape[2] if frame.ndim == 3 else 1
+        # Compare rows as flat channel runs; reducing over a channel axis is far slower
+        diff = frame.reshape(h, -1) != self.last_frame.reshape(h, -1)
+        gh, gw = -(-h // t), -(-w // t)
+        padded = np.zeros((gh * t, gw * t * ch), dtype=bool); padded[:h, :w * ch] = diff
+        return padded.reshape(gh, t, gw, t * ch).any(axis=(1, 3))
+
+    def _regions(self, grid):
+        """Bounding rectangles (pixels) of 4-connected groups of changed tiles."""
+        t = self.tile; seen = np.zeros_like(grid); rects = []
+        for r, c in zip(*np.nonzero(grid)):
+            if seen[r, c]: continue
+            stack = [(r, c)]; seen[r, c] = True; r0, c0, r1, c1 = r, c, r, c
+            while stack:
+                y, x = stack.pop()
+                r0, c0, r1, c1 = min(r0, y), min(c0, x), max(r1, y), max(c1, x)
+                for ny, nx in ((y-1, x), (y+1, x), (y, x-1), (y, x+1)):
+                    if 0 <= ny < grid.shape[0] and 0 <= nx < grid.shape[1] and grid[ny, nx] and not seen[ny, nx]:
+                        seen[ny, nx] = True; stack.append((ny, nx))
+            rects.append((c0 * t, r0 * t, (c1 + 1) * t, (r1 + 1) * t))
+        return rects
+
+    def process(self, frame):
+        """Updates the cached text-block map from a new frame and returns a copy of it."""
+        with self._lock:
+            start = time.perf_counter()
+            frame = np.asarray(frame)
+            h, w = frame.shape[:2]
+            self.stats["frames"] += 1
+            if self.last_frame is None or self.last_frame.shape != frame.shape:
+                self._full_pass(frame)
+            else:
+                grid = None if np.array_equal(frame, self.last_frame) else self.changed_tiles(frame)
+                if grid is None or not grid.any():
+                    self.stats["unchanged"] += 1
+                elif grid.mean() > self.full_threshold:
+                    self._full_pass(frame)
+                else:
+                    self._partial_pass(frame, grid, w, h)
+            self.last_frame = frame
+            self.stats["last_ms"] = (time.perf_counter() - start) * 1000
+            return list(self.blocks)
+
+    @staticmethod
+    def _clip(rect, w, h):
+        """Integer pixel bounds of a rectangle, covering it and clipped to the frame."""
+        return (max(0, math.floor(rect[0])), max(0, math.floor(rect[1])), min(w, math.ceil(rect[2])), min(h, math.ceil(rect[3])))
+
+    def _full_pass(self, frame):
+        self.blocks = list(self.recognize(frame))
+        self.stats["full_passes"] += 1; self.frame_id += 1
+
+    def _partial_pass(self, frame, grid, w, h):
+        m = self.margin
+        crops = [(max(0, x0 - m), max(0, y0 - m), min(w, x1 + m), min(h, y1 + m)) for x0, y0, x1, y1 in self._regions(grid)]
+        rects = [self._clip(_box_rect(b["box"]), w, h) for b in self.blocks]
+        while True:
+            # Grow each crop (margin included) over any text it cuts through, and merge crops that then
+            # overlap, until stable: every cached block ends up either wholly re-read or untouched
+            grown = []
+            for x0, y0, x1, y1 in crops:
+                for br in rects:
+                    if _intersects(br, (x0, y0, x1, y1)):
+                        x0, y0, x1, y1 = min(x0, br[0]), min(y0, br[1]), max(x1, br[2]), max(y1, br[3])
+                grown.append((x0, y0, x1, y1))
+            grown = _merge_rects(grown)
+            if grown == crops: break
+            crops = grown
+        kept = [b for b, br in zip(self.blocks, rects) if not any(_contains(c, br) for c in crops)]
+        for x0, y0, x1, y1 in crops:
+            for b in self.recognize(frame[y0:y1, x0:x1]):
+                b = dict(b); b["box"] = [[p[0] + x0, p[1] + y0] for p in b["box"]]
+                kept.append(b)
+        self.blocks = kept
+        self.stats["partial_passes"] += 1; self.stats["regions"] += len(crops); self.frame_id += 1
+
+def synthetic_frames(count, size=(1080, 1920), patch=64, seed=0):
+    """Yields a static noise 'desktop' where one small patch changes every few frames."""
+    rng = np.random.default_rng(seed)
+    frame = rng.integers(0, 255, size=(*size, 3), dtype=np.uint8)
+    for i in range(count):
+        if i % 4 == 3:
+            frame = frame.copy()
+            y, x = rng.integers(0, size[0] - patch), rng.integers(0, size[1] - patch)
+            frame[y:y+patch, x:x+patch] = rng.integers(0, 255, size=(patch, patch, 3), dtype=np.uint8)
+        yield frame
+
+def benchmark(frames, recognize, **engine_kwargs):
+    """Runs an IncrementalOCR over a frame sequence; returns (per-frame ms, stats)."""
+    engine = IncrementalOCR(recognize, **engine_kwargs)
+    timings = []
+    for f in frames:
+        engine.process(f); timings.append(engine.stats["last_ms"])
+    return timings, engine.stats
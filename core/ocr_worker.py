@@ -0,0 +1,155 @@
+import collections
+import concurrent.futures
+import itertools
+import multiprocessing as mp
+import threading
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait as wait_any
+import numpy as np
+
+from core.ocr_engine import read_blocks
+
+def _worker_main(req_q, res_q, languages, gpu, torch_threads, read_kwargs):
+    """Worker process: owns one EasyOCR reader and serves frames passed through shared memory."""
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+    except ImportError: pass
+    import easyocr
+    reader = easyocr.Reader(list(languages), gpu=gpu)
+    while True:
+        msg = req_q.get()
+        if msg is None: break
+        req_id, shm_name, shape, dtype = msg
+        try:
+            shm = shared_memory.SharedMemory(name=shm_name)
+        except FileNotFoundError:
+            res_q.put((req_id, None, "frame released before it was read")); continue
+        try:
+            img = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+            res_q.put((req_id, read_blocks(reader, img, **read_kwargs), None))
+        except Exception as e:
+            res_q.put((req_id, None, repr(e)))
+        finally:
+            img = None; shm.close()
+
+class OCRWorkerPool:
+    """Runs OCR in persistent worker processes so torch never competes with the UI thread for the GIL.
+
+    Frames are copied once into a shared-memory block (not pickled) when a worker becomes free.
+    Requests queue in submission order; submitting with a `key` cancels older queued requests
+    with the same key, since only the newest screenshot matters. A watcher thread notices workers
+    that exit (e.g. easyocr failed to import or download its model in the child): their in-flight
+    requests fail at once, and once no worker is left every queued and new request fails too.
+    """
+    def __init__(self, workers=1, torch_threads=2, languages=("en",), gpu=False, **read_kwargs):
+        ctx = mp.get_context("spawn") # torch is not fork-safe, and Windows only spawns anyway
+        self._res_q = ctx.Queue()
+        self._workers = []
+        for i in range(workers):
+            req_q = ctx.Queue()
+            p = ctx.Process(target=_worker_main, args=(req_q, self._res_q, languages, gpu, torch_threads, read_kwargs), daemon=True, name=f"ocr-worker-{i}")
+            p.start(); self._workers.append((p, req_q))
+        self._idle = list(range(workers))
+        self._dead = set()
+        self._pending = collections.deque() # (req_id, key, future, frame)
+        self._inflight = {}                 # req_id -> (future, shm, worker)
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._collector = threading.Thread(target=self._collect, daemon=True, name="ocr-collector")
+        self._collector.start()
+        self._watcher = threading.Thread(target=self._watch, daemon=True, name="ocr-watcher")
+        self._watcher.start()
+
+    def submit(self, frame, key=None):
+        future = concurrent.futures.Future()
+        with self._lock:
+            if self._closed: raise RuntimeError("OCR worker pool is shut down")
+            if len(self._dead) == len(self._workers):
+                future.set_exception(RuntimeError("OCR workers are not running")); return future
+            if key is not None: self._cancel_pending(key)
+            self._pending.append((next(self._ids), key, future, frame))
+            self._dispatch()
+        return future
+
+    def recognize(self, img, key=None, timeout=None):
+        """Blocking helper with the same contract as read_blocks()."""
+        return self.submit(img, key).result(timeout)
+
+    def is_alive(self):
+        return any(p.is_alive() for i, (p, _) in enumerate(self._workers) if i not in self._dead)
+
+    def cancel(self, key):
+        with self._lock: return self._cancel_pending(key)
+
+    def _cancel_pending(self, key):
+        stale = [r for r in self._pending if r[1] == key]
+        for r in stale:
+            self._pending.remove(r); r[2].cancel()
+        return len(stale)
+
+    def _dispatch(self):
+        # Caller holds self._lock
+        while self._idle and self._pending:
+            req_id, _, future, frame = self._pending.popleft()
+            if not future.set_running_or_notify_cancel(): continue
+            frame = np.asarray(frame)
+            shm = shared_memory.SharedMemory(create=True, size=max(1, frame.nbytes))
+            np.copyto(np.ndarray(frame.shape, dtype=frame.dtype, buffer=shm.buf), frame)
+            worker = self._idle.pop()
+            self._inflight[req_id] = (future, shm, worker)
+            self._workers[worker][1].put((req_id, shm.name, frame.shape, frame.dtype.str))
+
+    def _collect(self):
+        while True:
+            msg = self._res_q.get()
+            if msg is None: break
+            req_id, blocks, error = msg
+            with self._lock:
+                entry = self._inflight.pop(req_id, None)
+                if entry is None: continue # Its worker died and the request was already failed
+                future, shm, worker = entry
+                shm.close(); shm.unlink()
+                self._idle.append(worker)
+                self._dispatch()
+            if error: future.set_exception(RuntimeError(f"OCR worker failed: {error}"))
+            else: future.set_result(blocks)
+
+    def _watch(self):
+        while not self._closed:
+            with self._lock: alive = {p.sentinel: i for i, (p, _) in enumerate(self._workers) if i not in self._dead}
+            if not alive: break
+            for sentinel in wait_any(list(alive), timeout=1.0):
+                if not self._closed: self._worker_died(alive[sentinel])
+
+    def _worker_died(self, worker):
+        failed = []
+        with self._lock:
+            self._dead.add(worker)
+            if worker in self._idle: self._idle.remove(worker)
+            for req_id, (future, shm, w) in list(self._inflight.items()):
+                if w != worker: continue
+                del self._inflight[req_id]; shm.close(); shm.unlink(); failed.append(future)
+            if len(self._dead) == len(self._workers):
+                while self._pending:
+                    future = self._pending.popleft()[2]
+                    if future.set_running_or_notify_cancel(): failed.append(future)
+        proc = self._workers[worker][0]; proc.join(timeout=1.0); code = proc.exitcode
+        print(f"[OCR] Worker {worker} exited (code {code}).")
+        for future in failed: future.set_exception(RuntimeError(f"OCR worker exited with code {code}"))
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            while self._pending: self._pending.popleft()[2].cancel()
+        for p, req_q in self._workers: req_q.put(None)
+        for p, _ in self._workers:
+            p.join(timeout=5)
+            if p.is_alive(): p.terminate()
+        self._res_q.put(None); self._collector.join(timeout=5)
+        with self._lock:
+            for future, shm, _ in self._inflight.values():
+                shm.close(); shm.unlink()
+                if not future.done(): future.set_exception(RuntimeError("OCR worker pool is shut down"))
+            self._inflight.clear()
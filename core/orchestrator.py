@@ -11,7 +11,7 @@ class CEOBrain:
         print(f"[CEO] New High-Level Request: {user_request}")
         
         # 1. PERCEPTION: Get current context
-        context = self.brain.vision_cortex.get_context_string()
+        context = self.brain._get_screen_context()
         system_vitals = f"CPU: {self.brain.monitor.cpu_high}%" # simplified
         
         # 2. PLANNING: Ask LLM for a multi-step plan
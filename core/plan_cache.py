@@ -0,0 +1,101 @@
+import collections
+import threading
+
+from core.security import SecurityEngine
+from core.vector_index import normalize
+
+Plan = collections.namedtuple("Plan", "steps source confidence origin")
+
+# Written by the CEO reflection loop when a task failed; it marks a problem, not an action
+PLACEHOLDER_ACTIONS = {"optimization_needed"}
+
+def parse_plan(text):
+    """'EXECUTE: a | b' or 'a | b' -> ['a', 'b']."""
+    text = text.strip()
+    if text.lower().startswith("execute:"): text = text[8:]
+    return [s.strip() for s in text.split("|") if s.strip()]
+
+class PlanCache:
+    """Resolves a command to a known plan before the LLM is asked.
+
+    Sources, most trusted first: mappings the user taught the learner, corrections, and
+    well-rated episodes (vector similarity). Each has a confidence; plans under
+    `min_confidence` are ignored. Results are memoized per normalized command and the memo
+    is dropped when the app registry or any source changes. "open X" steps must still
+    resolve in the current registry, so plans for uninstalled apps stop replaying. A plan borrowed
+    from a similar command is dropped when that command is riskier than the one asked for, so a
+    low-risk request can never replay a destructive plan.
+    """
+    def __init__(self, learner, correction, episodic, app_discovery, min_confidence=0.85,
+                 source_confidence=None, memo_size=512, security=None):
+        self.learner = learner; self.correction = correction; self.episodic = episodic
+        self.app_discovery = app_discovery
+        self.security = security or SecurityEngine()
+        self.min_confidence = min_confidence
+        self.source_confidence = {"mapping": 1.0, "correction": 0.95, **(source_confidence or {})}
+        self.memo_size = memo_size
+        self._memo = collections.OrderedDict() # normalized command -> Plan or None
+        self._stamp = None
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "memo_hits": 0, "stale": 0, "riskier": 0}
+
+    def _current_stamp(self):
+        return (self.app_discovery.version, self.learner.revision, self.correction.revision, self.episodic.revision)
+
+    def lookup(self, command):
+        """Returns a Plan or None."""
+        key = normalize(command)
+        stamp = self._current_stamp()
+        with self._lock:
+            if stamp != self._stamp: self._memo.clear(); self._stamp = stamp
+            if key in self._memo:
+                self._memo.move_to_end(key); self.stats["memo_hits"] += 1
+                plan = self._memo[key]
+                self.stats["hits" if plan else "misses"] += 1
+                return plan
+        plan = self._resolve(command, key)
+        with self._lock:
+            if stamp == self._stamp:
+                self._memo[key] = plan
+                while len(self._memo) > self.memo_size: self._memo.popitem(last=False)
+            self.stats["hits" if plan else "misses"] += 1
+        return plan
+
+    def invalidate(self):
+        with self._lock: self._memo.clear(); self._stamp = None
+
+    def _resolve(self, command, key):
+        for plan in self._candidates(command, key):
+            if plan.confidence < self.min_confidence: continue
+            if plan.source == "episode" and plan.confidence < 1.0 and self._escalates(command, plan):
+                self.stats["riskier"] += 1; continue
+            if self._is_valid(plan.steps): return plan
+            self.stats["stale"] += 1
+        return None
+
+    def _candidates(self, command, key):
+        for phrase in dict.fromkeys((command.lower().strip(), key)):
+            mapped = self.learner.get_mapped_command(phrase)
+            if mapped:
+                yield Plan(parse_plan(mapped), "mapping", self.source_confidence["mapping"], phrase)
+            corrected = self.correction.get_optimized_action(phrase)
+            if corrected and corrected.strip() not in PLACEHOLDER_ACTIONS and corrected.strip() != phrase:
+                yield Plan(parse_plan(corrected), "correction", self.source_confidence["correction"], phrase)
+        match = self.episodic.find_similar(command, self.min_confidence)
+        if match:
+            score, episode = match
+            yield Plan(list(episode["actions"]), "episode", score, episode["command"])
+
+    def _escalates(self, command, plan):
+        """True if the command the plan was recorded for sits in a higher risk tier than `command`."""
+        tiers = ("low", "medium", "high", "critical"); sec = self.security
+        tier = lambda text: tiers.index(sec.get_behavior(sec.score_step(text)))
+        return tier(plan.origin) > tier(command)
+
+    def _is_valid(self, steps):
+        if not steps: return False
+        for step in steps:
+            if step.startswith("open "):
+                target = step[5:].strip()
+                if "." not in target and not self.app_discovery.find_app_key(target): return False
+        return True
@@ -0,0 +1,89 @@
+import threading
+import time
+
+class PromptFragment:
+    """One cached piece of the prompt with its own invalidation rule.
+
+    - version_fn: rebuild only when the returned value changes (e.g. a registry version)
+    - max_age: value is fresh for this many seconds
+    - background: when stale, return the old value (or the fallback) and refresh on a thread
+    """
+    def __init__(self, name, builder, version_fn=None, max_age=None, background=False, fallback=None):
+        self.name = name
+        self.builder = builder
+        self.version_fn = version_fn
+        self.max_age = max_age
+        self.background = background
+        self.fallback = fallback
+        self.value = None; self.version = None; self.built_at = 0.0
+        self.builds = 0; self.hits = 0; self.build_time = 0.0; self.last_build_time = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def _is_fresh(self):
+        if self.value is None: return False
+        if self.version_fn and self.version_fn() != self.version: return False
+        if self.max_age is not None and time.monotonic() - self.built_at > self.max_age: return False
+        return True
+
+    def _build(self):
+        version = self.version_fn() if self.version_fn else None
+        start = time.perf_counter()
+        value = self.builder()
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.value = value; self.version = version; self.built_at = time.monotonic()
+            self.builds += 1; self.build_time += elapsed; self.last_build_time = elapsed
+        return value
+
+    def _refresh_worker(self):
+        try: self._build()
+        except Exception as e: print(f"[Prompt] Refresh of '{self.name}' failed: {e}")
+        finally: self._refreshing = False
+
+    def refresh_async(self):
+        with self._lock:
+            if self._refreshing: return
+            self._refreshing = True
+        threading.Thread(target=self._refresh_worker, daemon=True).start()
+
+    def invalidate(self):
+        with self._lock: self.value = None
+
+    def get(self):
+        if self._is_fresh():
+            self.hits += 1; return self.value
+        if not self.background: return self._build()
+        self.refresh_async()
+        if self.value is not None:
+            self.hits += 1; return self.value
+        return self.fallback() if callable(self.fallback) else (self.fallback or "")
+
+class PromptBuilder:
+    """Registry of prompt fragments plus their build-cost metrics."""
+    def __init__(self):
+        self.fragments = {}
+
+    def add(self, fragment):
+        self.fragments[fragment.name] = fragment
+        return fragment
+
+    def get(self, name):
+        return self.fragments[name].get()
+
+    def refresh_async(self, name):
+        self.fragments[name].refresh_async()
+
+    def invalidate(self, name):
+        self.fragments[name].invalidate()
+
+    def get_metrics(self):
+        return {f.name: {"builds": f.builds, "hits": f.hits, "last_ms": f.last_build_time * 1000,
+                         "avg_ms": (f.build_time / f.builds * 1000) if f.builds else 0.0}
+                for f in self.fragments.values()}
+
+    def get_metrics_report(self):
+        lines = []
+        for name, m in self.get_metrics().items():
+            lines.append(f"- {name}: {m['builds']} builds, {m['hits']} hits, last {m['last_ms']:.0f} ms, avg {m['avg_ms']:.0f} ms")
+        return "\n".join(lines)
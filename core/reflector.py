@@ -1,29 +1,33 @@
 import json
 import collections
+import itertools
 
 class ExperienceReflector:
-    def __init__(self, brain):
+    def __init__(self, brain, min_count=3):
         self.brain = brain
+        self.min_count = min_count
+        # Successful command counts, kept up to date per recorded episode instead of recounted per call
+        self.counts = collections.Counter()
+        self.frequent = {} # commands that reached min_count, in the order they did
+        for ep in brain.episodic.episodes: self._observe(ep)
+        brain.episodic.subscribe(self._observe)
+
+    def _observe(self, episode):
+        if episode["rating"] < 4: return
+        cmd = episode["command"]
+        self.counts[cmd] += 1
+        if self.counts[cmd] == self.min_count: # If you did it 3 times
+            self.frequent[cmd] = f"Auto-execute '{cmd}' in the future?"
 
     def analyze_patterns(self):
-        """Mines episodic memory for repeated successful sequences."""
-        episodes = self.brain.episodic.episodes
-        if len(episodes) < 5: return None
-        
-        # Extract commands
-        commands = [e["command"] for e in episodes if e["rating"] >= 4]
-        
-        # Find frequency
-        counts = collections.Counter(commands)
-        suggestions = []
-        for cmd, count in counts.items():
-            if count >= 3: # If you did it 3 times
-                suggestions.append(f"Auto-execute '{cmd}' in the future?")
-        
-        return suggestions
+        """Suggestions for commands repeated successfully; O(suggestions), no rescan of episodic memory."""
+        if len(self.brain.episodic.episodes) < 5: return None
+        return list(self.frequent.values())
 
     def generate_optimized_prompt(self):
         """Summarizes top successes to prime the LLM's next session."""
-        recent_success = [e["command"] for e in self.brain.episodic.episodes[-10:] if e["rating"] >= 4]
+        episodes = self.brain.episodic.episodes
+        recent = itertools.islice(reversed(episodes), 10) # A deque, so no slicing
+        recent_success = [e["command"] for e in recent if e["rating"] >= 4]
         if not recent_success: return ""
         return f"Recent successful user habits: {', '.join(set(recent_success))}."
@@ -1,30 +1,150 @@
-class SecurityEngine:
+import collections
+import re
+import threading
+import time
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Keyword -> risk weight, matched as whole words (or phrases) anywhere in a step
+DEFAULT_WEIGHTS = {
+    "shutdown": 100,
+    "delete": 90,
+    "format": 100,
+    "create_skill": 85,
+    "execute": 80,
+    "click": 40,
+    "type": 30,
+    "open": 20,
+    "volume": 5,
+    "brightness": 5
+}
+
+# (verb, argument phrase, weight): applies only when the step starts with `verb` and its
+# argument contains the phrase, e.g. opening a shell is riskier than opening a browser
+DEFAULT_ARGUMENT_RULES = [
+    ("open", "cmd", 70), ("open", "command prompt", 70), ("open", "powershell", 70),
+    ("open", "terminal", 70), ("open", "regedit", 80), ("open", "registry editor", 80),
+    ("open", "task manager", 50),
+    ("click text", "uninstall", 85), ("click text", "remove", 60), ("click text", "erase", 90),
+    ("type", "password", 60), ("type", "rm", 85), ("type", "del", 85),
+]
+
+def words(text):
+    """Lowercase alphanumeric words; underscores and punctuation separate words."""
+    return WORD_RE.findall(text.lower())
+
+def word_forms(word):
+    """The word and its likely stems, so "deleting" and "opens" hit the rules for "delete" and "open"."""
+    yield word
+    for suffix in ("ing", "ed", "es", "s"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            stem = word[:-len(suffix)]
+            yield stem; yield stem + "e"
+            if stem[-1] == stem[-2]: yield stem[:-1] # "formatting" -> "format"
+            break
+
+class _PhraseTable:
+    """Phrase -> weight, looked up per word position: cost depends on the step's length and the
+    longest phrase, not on the number of rules."""
     def __init__(self):
-        # Weights for risk factors
-        self.weights = {
-            "shutdown": 100,
-            "delete": 90,
-            "format": 100,
-            "create_skill": 85,
-            "execute": 80,
-            "click": 40,
-            "type": 30,
-            "open": 20,
-            "volume": 5,
-            "brightness": 5
-        }
+        self.phrases = {} # tuple of words -> weight
+        self.max_words = 1
 
-    def get_risk_score(self, actions):
-        """Calculates a 0-100 score based on the action chain."""
-        score = 0
-        for action in actions:
-            for key, val in self.weights.items():
-                if key in action.lower():
-                    score = max(score, val)
+    def add(self, phrase, weight):
+        key = tuple(words(phrase))
+        if not key: raise ValueError(f"Rule has no words: {phrase!r}")
+        self.phrases[key] = max(weight, self.phrases.get(key, 0))
+        self.max_words = max(self.max_words, len(key))
+
+    def match(self, tokens):
+        """[(phrase, weight)] for every rule found in `tokens`."""
+        hits = []; phrases = self.phrases
+        for i, token in enumerate(tokens):
+            for form in word_forms(token):
+                w = phrases.get((form,))
+                if w is not None: hits.append((form, w)); break
+            for n in range(2, min(self.max_words, len(tokens) - i) + 1):
+                w = phrases.get(tuple(tokens[i:i+n]))
+                if w is not None: hits.append((" ".join(tokens[i:i+n]), w))
+        return hits
+
+class SecurityEngine:
+    """Scores action chains 0-100 from keyword and per-argument rules.
+
+    Rules match whole words, so "reopen" and "prototype" no longer count as "open" and "type".
+    Each step is tokenized once and looked up in hash tables, so scoring cost stays flat as the
+    rule set grows. Verdicts are cached per step text (`cache_size` entries, LRU).
+    """
+    def __init__(self, weights=None, argument_rules=None, cache_size=4096):
+        self.weights = dict(DEFAULT_WEIGHTS if weights is None else weights)
+        self.argument_rules = list(DEFAULT_ARGUMENT_RULES if argument_rules is None else argument_rules)
+        self.cache_size = cache_size
+        self._cache = collections.OrderedDict() # normalized step -> score
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+        self._compile()
+
+    def _compile(self):
+        keywords = _PhraseTable()
+        for key, val in self.weights.items(): keywords.add(key, val)
+        verbs = {} # tuple of verb words -> _PhraseTable of argument phrases
+        for verb, phrase, weight in self.argument_rules:
+            verbs.setdefault(tuple(words(verb)), _PhraseTable()).add(phrase, weight)
+        with self._lock:
+            self._keywords = keywords; self._verbs = verbs
+            self._verb_lengths = sorted({len(v) for v in verbs}, reverse=True)
+            self._cache.clear()
+
+    def add_rule(self, phrase, weight, verb=None):
+        """Adds a keyword rule, or an argument rule when `verb` is given; cached verdicts are dropped."""
+        if verb is None: self.weights[phrase] = weight
+        else: self.argument_rules.append((verb, phrase, weight))
+        self._compile()
+
+    def explain(self, step):
+        """[(rule, weight)] that fired for one step; argument rules are reported as "verb: phrase"."""
+        tokens = words(step)
+        hits = self._keywords.match(tokens)
+        for n in self._verb_lengths:
+            table = self._verbs.get(tuple(tokens[:n]))
+            if table:
+                verb = " ".join(tokens[:n])
+                hits.extend((f"{verb}: {p}", w) for p, w in table.match(tokens[n:]))
+        return hits
+
+    def score_step(self, step):
+        key = " ".join(step.lower().split())
+        with self._lock:
+            score = self._cache.get(key)
+            if score is not None:
+                self._cache.move_to_end(key); self.stats["hits"] += 1
+                return score
+        score = max((w for _, w in self.explain(key)), default=0)
+        with self._lock:
+            self._cache[key] = score; self.stats["misses"] += 1
+            while len(self._cache) > self.cache_size: self._cache.popitem(last=False)
         return score
 
+    def get_risk_score(self, actions):
+        """Calculates a 0-100 score based on the action chain: the riskiest step wins."""
+        return max((self.score_step(a) for a in actions), default=0)
+
     def get_behavior(self, score):
         if score <= 20: return "low"      # Auto-allow
         if score <= 50: return "medium"   # Click allow
         if score <= 80: return "high"     # Confirm popup
-        return "critical"                 # Typed confirmation
\ No newline at end of file
+        return "critical"                 # Typed confirmation
+
+def benchmark(rules=(10, 100, 1000), steps=20000):
+    """{rule count: microseconds per uncached step}, to check scoring cost stays flat."""
+    sample = ["open spotify", "click text reopen closed tab", "type hello world from the prototype",
+              "volume 40", "delete the old build folder", "search weather in london tomorrow"]
+    results = {}
+    for n in rules:
+        weights = {**DEFAULT_WEIGHTS, **{f"keyword {i}": i % 100 for i in range(n)}}
+        argument_rules = DEFAULT_ARGUMENT_RULES + [("open", f"target {i}", 50) for i in range(n)]
+        engine = SecurityEngine(weights, argument_rules, cache_size=0)
+        t0 = time.perf_counter()
+        for i in range(steps): engine.score_step(f"{sample[i % len(sample)]} {i}")
+        results[n] = (time.perf_counter() - t0) / steps * 1e6
+    return results
@@ -0,0 +1,95 @@
+import collections
+import heapq
+import random
+import time
+
+class SequenceMiner:
+    """Incremental frequent-sequence miner over a command stream (sliding n-grams).
+
+    Every observed command adds one count for each run of 2..max_len consecutive commands
+    ending at it, so an update is O(max_len) no matter how long the history is. Runs never
+    span a pause longer than `session_gap` seconds. A sequence is reported once through
+    `on_candidate(steps, count)` when its count reaches `min_support` and it follows its prefix
+    in at least `min_confidence` of the prefix's occurrences (so "X, then whatever came next"
+    is not a routine just because X is frequent).
+
+    Memory is bounded by `max_patterns`: when exceeded, counts at or below a rising floor are
+    pruned (lossy counting), which happens at most once per max_patterns/4 new patterns.
+    """
+    def __init__(self, max_len=4, min_support=3, min_confidence=0.5, session_gap=900.0, max_patterns=200000, on_candidate=None):
+        self.max_len = max_len
+        self.min_support = min_support
+        self.min_confidence = min_confidence
+        self.session_gap = session_gap
+        self.max_patterns = max_patterns
+        self.on_candidate = on_candidate
+        self.counts = collections.Counter() # tuple of commands (length 1..max_len) -> occurrences
+        self.emitted = set()
+        self.by_prefix = collections.defaultdict(set) # prefix -> emitted sequences extending it
+        self.window = collections.deque(maxlen=max_len)
+        self.last_time = None
+        self.floor = 0; self.events = 0; self.prunes = 0
+
+    def observe(self, command, timestamp=None):
+        timestamp = time.time() if timestamp is None else timestamp
+        if self.last_time is not None and timestamp - self.last_time > self.session_gap: self.window.clear()
+        self.last_time = timestamp; self.events += 1
+        if self.window and self.window[-1] == command: return # Repeats are not routines
+        self.window.append(command)
+        w = tuple(self.window); counts = self.counts
+        counts[w[-1:]] += 1
+        for n in range(2, len(w) + 1):
+            seq = w[-n:]
+            if len(set(seq)) < n: continue # A loop like a-b-a is the shorter routine repeated
+            c = counts[seq] = counts[seq] + 1
+            if c >= self.min_support and seq not in self.emitted and c >= self.min_confidence * counts.get(seq[:-1], c):
+                self.emitted.add(seq)
+                for i in range(1, n): self.by_prefix[seq[:i]].add(seq)
+                if self.on_candidate: self.on_candidate(list(seq), c)
+        if len(self.counts) > self.max_patterns: self._prune()
+
+    def _prune(self):
+        target = int(self.max_patterns * 0.75)
+        while len(self.counts) > target:
+            self.floor += 1
+            for seq in [s for s, c in self.counts.items() if c <= self.floor]: del self.counts[seq]
+        self.prunes += 1
+
+    def top(self, k=10, min_len=2):
+        """[(steps, count)] most frequent first; longer sequences win ties."""
+        best = heapq.nlargest(k, ((c, len(s), s) for s, c in self.counts.items() if len(s) >= min_len))
+        return [(list(s), c) for c, _, s in best]
+
+    def continuations(self, recent, k=3):
+        """Frequent sequences that start with the tail of `recent`: [(full steps, count)]."""
+        for n in range(min(len(recent), self.max_len - 1), 0, -1):
+            seqs = self.by_prefix.get(tuple(recent[-n:]))
+            if not seqs: continue
+            ranked = sorted(((self.counts.get(s, 0), len(s), s) for s in seqs), reverse=True)
+            return [(list(s), c) for c, _, s in ranked[:k] if c]
+        return []
+
+def synthetic_log(events, routines=20, routine_len=(2, 4), vocab=5000, routine_share=0.3, seed=0):
+    """Yields (command, timestamp): random commands with fixed routines mixed in."""
+    rng = random.Random(seed)
+    commands = [f"cmd {i}" for i in range(vocab)]
+    plans = [rng.sample(commands, rng.randint(*routine_len)) for _ in range(routines)]
+    t = 0.0; n = 0
+    while n < events:
+        t += rng.uniform(5, 120)
+        if rng.random() < routine_share:
+            for cmd in rng.choice(plans):
+                if n == events: break
+                yield cmd, t; t += rng.uniform(2, 20); n += 1
+        else:
+            yield rng.choice(commands), t; n += 1
+
+def benchmark(events=1000000, **miner_kwargs):
+    """Mines a synthetic log; returns (microseconds per event, patterns kept, candidates emitted, top 5)."""
+    found = []
+    miner = SequenceMiner(on_candidate=lambda steps, c: found.append(steps), **miner_kwargs)
+    log = list(synthetic_log(events))
+    t0 = time.perf_counter()
+    for cmd, ts in log: miner.observe(cmd, ts)
+    elapsed = time.perf_counter() - t0
+    return elapsed / events * 1e6, len(miner.counts), len(found), miner.top(5)
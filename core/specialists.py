@@ -0,0 +1,65 @@
+import threading
+import time
+import concurrent.futures
+
+class SpecialistRegistry:
+    """Builds specialists on first use and records how long each one took to initialize."""
+    def __init__(self, max_workers=3):
+        self.max_workers = max_workers
+        self._factories = {}
+        self._heavy = []
+        self._instances = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self.timings = {}
+
+    def register(self, name, factory, heavy=False):
+        """Registers a zero-argument factory. Heavy specialists are pre-built by warm_up()."""
+        self._factories[name] = factory
+        self._locks[name] = threading.Lock()
+        if heavy: self._heavy.append(name)
+
+    def __contains__(self, name):
+        return name in self._factories
+
+    def is_ready(self, name):
+        return name in self._instances
+
+    def get(self, name):
+        """Returns the specialist, building it on the calling thread if it is not ready yet."""
+        inst = self._instances.get(name)
+        if inst is not None: return inst
+        with self._locks[name]:
+            # Another thread (usually the warm-up pool) may have finished while we waited
+            if name in self._instances: return self._instances[name]
+            start = time.perf_counter()
+            inst = self._factories[name]()
+            elapsed = time.perf_counter() - start
+            self.timings[name] = elapsed
+            self._instances[name] = inst
+        print(f"[Registry] {name} ready in {elapsed*1000:.0f} ms ({threading.current_thread().name})")
+        return inst
+
+    def warm_up(self, names=None):
+        """Builds heavy specialists on a background pool. Returns {name: Future}."""
+        names = self._heavy if names is None else names
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="warmup")
+        return {n: self._executor.submit(self._warm_one, n) for n in names if n in self._factories}
+
+    def _warm_one(self, name):
+        try: return self.get(name)
+        except Exception as e:
+            # A failed warm-up is retried (and raises) on first real use
+            print(f"[Registry] Warm-up failed for {name}: {e}")
+
+    def get_timings_report(self):
+        """Returns per-specialist init timings, slowest first."""
+        if not self.timings: return "No specialists initialized yet."
+        rows = sorted(self.timings.items(), key=lambda kv: kv[1], reverse=True)
+        return "\n".join(f"- {name}: {t*1000:.0f} ms" for name, t in rows)
+
+    def shutdown(self):
+        if self._executor: self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,323 @@
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DATA_DIR = "data"
+DEFAULT_DB = os.path.join(DATA_DIR, "alex.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (store TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, PRIMARY KEY (store, key));
+CREATE TABLE IF NOT EXISTS logs (id INTEGER PRIMARY KEY AUTOINCREMENT, store TEXT NOT NULL, value TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS logs_store ON logs (store, id);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+_DELETED = object()
+
+class _Batch:
+    """Pending mutations, coalesced: the last write per (store, key) wins, clears drop older writes."""
+    def __init__(self):
+        self.records = {}     # (store, key) -> JSON text or _DELETED
+        self.cleared = set()  # stores wiped before the records/logs below apply
+        self.logs = []        # (store, JSON text, cap) in append order
+
+    def __bool__(self):
+        return bool(self.records or self.cleared or self.logs)
+
+    def __len__(self):
+        return len(self.records) + len(self.cleared) + len(self.logs)
+
+    def put(self, store, key, value):
+        self.records.pop((store, key), None); self.records[(store, key)] = value # Newest last, like rowid order
+
+    def clear(self, store):
+        self.records = {k: v for k, v in self.records.items() if k[0] != store}
+        self.logs = [l for l in self.logs if l[0] != store]
+        self.cleared.add(store)
+
+    def only(self, store):
+        """A copy holding just the mutations of one store."""
+        b = _Batch()
+        b.records = {k: v for k, v in self.records.items() if k[0] == store}
+        b.cleared = self.cleared & {store}
+        b.logs = [l for l in self.logs if l[0] == store]
+        return b
+
+    def merge(self, newer):
+        for store in newer.cleared: self.clear(store)
+        for (store, key), v in newer.records.items(): self.put(store, key, v)
+        self.logs.extend(newer.logs)
+
+class Storage:
+    """One SQLite database (WAL mode) behind all of Alex's persistent stores.
+
+    Stores are namespaces in two tables: `records` for keyed values (upsert/delete one row) and
+    `logs` for append-only lists with an optional cap. Values are JSON; keyed records keep their
+    insertion order (rowid) when updated. Reads always see pending writes, and a transaction()
+    block is committed atomically.
+
+    durability="immediate": every call (or transaction() block) is committed before it returns.
+    durability="deferred":  mutations are coalesced per record and committed by a background writer
+                            once writes pause for `flush_delay` seconds, at most `max_delay` after
+                            the first pending write, and at exit. A crash loses at most that window.
+    synchronous:            SQLite's fsync policy; "NORMAL" is atomic and fast in WAL mode, "FULL"
+                            also keeps committed data through a power loss.
+    """
+    def __init__(self, path=DEFAULT_DB, durability="deferred", synchronous="NORMAL", flush_delay=0.5, max_delay=2.0):
+        if durability not in ("immediate", "deferred"): raise ValueError(f"Unknown durability: {durability}")
+        self.path = path
+        self.durability = durability
+        self.flush_delay = flush_delay
+        self.max_delay = max_delay
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db_lock = threading.Lock() # Guards the connection
+        self._lock = threading.RLock()   # Guards the batches; readers never hold it while waiting on disk
+        self._cond = threading.Condition(self._lock)
+        self._pending = _Batch(); self._inflight = _Batch(); self._tx = None; self._tx_depth = 0
+        self._first_pending = None; self._last_write = 0.0
+        self._seq = 0; self._committed = 0 # Number of the last batch handed to the writer / written
+        self._closed = False
+        self.stats = {"flushes": 0, "flushed_ops": 0, "last_flush_ms": 0.0, "errors": 0}
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={synchronous}")
+        self._conn.executescript(_SCHEMA)
+        if durability == "deferred":
+            threading.Thread(target=self._write_loop, daemon=True, name="storage-writer").start()
+        atexit.register(self.close)
+
+    def transaction(self):
+        """Context manager grouping several writes into one atomic commit."""
+        return _Transaction(self)
+
+    def _batch(self):
+        # Caller holds self._lock
+        return self._tx if self._tx is not None else self._pending
+
+    def _queued(self):
+        # Caller holds self._lock. Applies the durability policy to newly queued work.
+        if self._tx is not None: return
+        now = time.monotonic(); self._last_write = now
+        if self._first_pending is None: self._first_pending = now
+        if self.durability == "immediate": self.flush()
+        else: self._cond.notify()
+
+    def _layers(self):
+        # Caller holds self._lock. Oldest first: being written, pending, open transaction.
+        return [b for b in (self._inflight, self._pending, self._tx) if b]
+
+    def _read(self, sql, params=()):
+        with self._db_lock: return self._conn.execute(sql, params).fetchall()
+
+    def _read_store(self, store, sql, params=()):
+        """(rows, layers): SQLite rows for one store and the unwritten layers (oldest first) to
+        apply on top of them. Layers are copied under self._lock and SQLite is queried without it,
+        so a slow read never blocks writers; batch numbers tell whether a copied layer reached
+        the disk meanwhile."""
+        while True:
+            with self._lock:
+                inflight = self._inflight.only(store) if self._inflight else None
+                layers = [b.only(store) for b in (self._inflight, self._pending, self._tx) if b]
+                seq = self._seq
+            if any(store in b.cleared for b in layers): return [], layers # Nothing on disk survives a clear
+            with self._db_lock:
+                committed = self._committed
+                rows = self._conn.execute(sql, params).fetchall()
+            if committed == seq and inflight is not None: return rows, layers[1:] # Written while we waited
+            if committed <= seq: return rows, layers
+            # A batch copied as pending was written too; copy again rather than apply it twice
+
+    # --- keyed records ---
+    def put(self, store, key, value):
+        with self._lock:
+            self._batch().put(store, key, json.dumps(value))
+            self._queued()
+
+    def put_many(self, store, items):
+        with self.transaction():
+            for key, value in items: self.put(store, key, value)
+
+    def delete(self, store, key):
+        with self._lock:
+            self._batch().put(store, key, _DELETED)
+            self._queued()
+
+    def get(self, store, key, default=None):
+        with self._lock:
+            for b in reversed(self._layers()):
+                v = b.records.get((store, key))
+                if v is _DELETED: return default
+                if v is not None: return json.loads(v)
+                if store in b.cleared: return default
+        # Not pending: the disk has it, or a newer value written since
+        rows = self._read("SELECT value FROM records WHERE store = ? AND key = ?", (store, key))
+        return json.loads(rows[0][0]) if rows else default
+
+    def items(self, store):
+        """{key: value} in insertion order."""
+        rows, layers = self._read_store(store, "SELECT key, value FROM records WHERE store = ? ORDER BY rowid", (store,))
+        raw = dict(rows)
+        for b in layers:
+            if store in b.cleared: raw = {}
+            for (_, k), v in b.records.items():
+                if v is _DELETED: raw.pop(k, None)
+                else: raw[k] = v
+        return {k: json.loads(v) for k, v in raw.items()}
+
+    # --- append-only logs ---
+    def append(self, store, value, cap=None):
+        """Appends one entry; with `cap`, older entries are trimmed when the batch is written."""
+        with self._lock:
+            self._batch().logs.append((store, json.dumps(value), cap))
+            self._queued()
+
+    def tail(self, store, limit=None):
+        """Log entries oldest first (the newest `limit` if given)."""
+        if limit is None: sql, params = "SELECT value FROM logs WHERE store = ? ORDER BY id", (store,)
+        else: sql, params = "SELECT value FROM (SELECT id, value FROM logs WHERE store = ? ORDER BY id DESC LIMIT ?) ORDER BY id", (store, limit)
+        rows, layers = self._read_store(store, sql, params)
+        raw = [v for (v,) in rows]
+        for b in layers:
+            if store in b.cleared: raw = []
+            raw.extend(v for _, v, _ in b.logs)
+        if limit is not None: raw = raw[-limit:] if limit else []
+        return [json.loads(v) for v in raw]
+
+    def clear(self, store):
+        with self._lock:
+            self._batch().clear(store)
+            self._queued()
+
+    # --- writing ---
+    def flush(self):
+        """Commits everything pending in one transaction; returns the number of coalesced ops."""
+        with self._lock:
+            if self._tx is not None or not self._pending: return 0
+            batch, self._pending = self._pending, _Batch()
+            self._inflight = batch; self._first_pending = None
+            self._seq += 1; seq = self._seq
+        t0 = time.perf_counter()
+        try:
+            with self._db_lock: self._commit(batch); self._committed = seq
+        except sqlite3.Error as e:
+            print(f"[Storage] Flush failed, will retry: {e}")
+            with self._lock:
+                batch.merge(self._pending); self._pending = batch; self._inflight = _Batch()
+                self._first_pending = time.monotonic(); self.stats["errors"] += 1
+            return 0
+        with self._lock:
+            self._inflight = _Batch()
+            self.stats["flushes"] += 1; self.stats["flushed_ops"] += len(batch)
+            self.stats["last_flush_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+        return len(batch)
+
+    def _commit(self, batch):
+        # Caller holds self._db_lock
+        c = self._conn
+        c.execute("BEGIN")
+        try:
+            for store in batch.cleared:
+                c.execute("DELETE FROM records WHERE store = ?", (store,)); c.execute("DELETE FROM logs WHERE store = ?", (store,))
+            for (store, key), v in batch.records.items():
+                if v is _DELETED: c.execute("DELETE FROM records WHERE store = ? AND key = ?", (store, key))
+                else: c.execute("INSERT INTO records (store, key, value) VALUES (?, ?, ?) "
+                                "ON CONFLICT (store, key) DO UPDATE SET value = excluded.value", (store, key, v))
+            caps = {}
+            for store, v, cap in batch.logs:
+                c.execute("INSERT INTO logs (store, value) VALUES (?, ?)", (store, v))
+                if cap: caps[store] = cap
+            for store, cap in caps.items():
+                c.execute("DELETE FROM logs WHERE store = ? AND id < (SELECT id FROM logs WHERE store = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                          (store, store, cap - 1))
+            c.execute("COMMIT")
+        except BaseException:
+            c.execute("ROLLBACK"); raise
+
+    def _write_loop(self):
+        with self._lock:
+            while not self._closed:
+                if not self._pending or self._tx is not None:
+                    self._cond.wait(1.0); continue
+                due = min(self._last_write + self.flush_delay, self._first_pending + self.max_delay)
+                wait = due - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait); continue
+                self._lock.release()
+                try: self.flush()
+                finally: self._lock.acquire()
+
+    # --- one-time JSON migration ---
+    def migrate_json(self, json_path, importer):
+        """Imports a legacy JSON file once: importer(data) performs the writes in one transaction.
+
+        The file is renamed to <name>.migrated afterwards, so a second run (or a crash before the
+        rename) never imports twice; the meta table records what was done.
+        """
+        marker = f"migrated:{os.path.basename(json_path)}"
+        if not os.path.exists(json_path): return False
+        if self._read("SELECT 1 FROM meta WHERE key = ?", (marker,)):
+            try: os.replace(json_path, json_path + ".migrated") # Crashed before the rename last time
+            except OSError: pass
+            return False
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f: data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[Storage] Skipping unreadable {json_path}: {e}"); data = None
+        with self.transaction():
+            if data is not None: importer(data)
+        self.flush() # The import must be on disk before the marker and the rename
+        with self._db_lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (marker, json_path))
+        try: os.replace(json_path, json_path + ".migrated")
+        except OSError: pass
+        print(f"[Storage] Migrated {json_path} into {self.path}")
+        return True
+
+    def close(self):
+        """Flushes pending writes and stops the writer; registered with atexit."""
+        with self._lock:
+            if self._closed: return
+            self._closed = True; self._cond.notify_all()
+        self.flush()
+        with self._db_lock: self._conn.close()
+
+class _Transaction:
+    def __init__(self, storage):
+        self.storage = storage
+
+    def __enter__(self):
+        s = self.storage; s._lock.acquire()
+        if s._tx_depth == 0: s._tx = _Batch()
+        s._tx_depth += 1
+        return s
+
+    def __exit__(self, exc_type, *exc):
+        s = self.storage
+        try:
+            s._tx_depth -= 1
+            if s._tx_depth == 0:
+                tx, s._tx = s._tx, None
+                if exc_type is None and tx:
+                    s._pending.merge(tx); s._queued()
+        finally:
+            s._lock.release()
+        return False
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+def open_storage(path=DEFAULT_DB, **options):
+    """Shared Storage per database file, so every store in a process uses one connection.
+
+    `options` (durability, synchronous, flush_delay, max_delay) apply when the file is first
+    opened; ALEX_STORAGE_DURABILITY overrides the default durability.
+    """
+    key = os.path.abspath(path)
+    with _instances_lock:
+        if key not in _instances:
+            options.setdefault("durability", os.environ.get("ALEX_STORAGE_DURABILITY", "deferred"))
+            _instances[key] = Storage(path, **options)
+        return _instances[key]
@@ -0,0 +1,93 @@
+import re
+import threading
+
+EXECUTE_MARKER = "EXECUTE:"
+# A sentence ends at . ! ? (optionally followed by quotes/brackets) plus whitespace, or at a newline
+SENTENCE_END = re.compile(r"[.!?]+[\"')\]]*\s+|\n+")
+
+class SentenceSplitter:
+    """Accumulates streamed text and returns sentences as soon as they are complete."""
+    def __init__(self):
+        self.buffer = ""
+
+    def feed(self, text):
+        self.buffer += text
+        sentences = []; pos = 0
+        for m in SENTENCE_END.finditer(self.buffer):
+            s = self.buffer[pos:m.end()].strip()
+            if s: sentences.append(s)
+            pos = m.end()
+        self.buffer = self.buffer[pos:]
+        return sentences
+
+    def flush(self):
+        rest = self.buffer.strip(); self.buffer = ""
+        return [rest] if rest else []
+
+def split_sentences(text):
+    splitter = SentenceSplitter()
+    return splitter.feed(text) + splitter.flush()
+
+class ResponseStream:
+    """Routes an LLM token stream: prose before EXECUTE: goes to on_sentence, the step list to on_step.
+
+    Steps are emitted as soon as their trailing '|' arrives; the last one when finish() is called.
+    `steps` is appended to in place, so consumers may hold on to the list while it grows.
+    """
+    def __init__(self, on_sentence=None, on_step=None):
+        self.on_sentence = on_sentence; self.on_step = on_step
+        self.text = ""; self.steps = []
+        self.failed = False
+        self.done = threading.Event()
+        self._splitter = SentenceSplitter()
+        self._spoken = 0      # chars of self.text handed to the splitter
+        self._step_pos = None # start of the unparsed step text, once the marker is seen
+
+    @property
+    def has_actions(self):
+        return self._step_pos is not None
+
+    def feed(self, delta):
+        self.text += delta
+        if self._step_pos is None:
+            idx = self.text.find(EXECUTE_MARKER)
+            if idx < 0:
+                # Hold back a possible partial marker at the tail
+                self._speak_until(max(self._spoken, len(self.text) - len(EXECUTE_MARKER) + 1))
+                return
+            self._speak_until(idx); self._flush_speech()
+            self._step_pos = idx + len(EXECUTE_MARKER)
+        while True:
+            bar = self.text.find("|", self._step_pos)
+            if bar < 0: break
+            self._emit_step(self.text[self._step_pos:bar]); self._step_pos = bar + 1
+
+    def finish(self, failed=False):
+        """Flushes the remaining sentence/step and releases anyone waiting on `done`."""
+        self.failed = failed
+        if not failed:
+            if self._step_pos is None:
+                self._speak_until(len(self.text)); self._flush_speech()
+            else:
+                self._emit_step(self.text[self._step_pos:]); self._step_pos = len(self.text)
+        self.done.set()
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+    def _speak_until(self, end):
+        if end <= self._spoken: return
+        for s in self._splitter.feed(self.text[self._spoken:end]): self._emit_sentence(s)
+        self._spoken = end
+
+    def _flush_speech(self):
+        for s in self._splitter.flush(): self._emit_sentence(s)
+
+    def _emit_sentence(self, s):
+        if self.on_sentence: self.on_sentence(s)
+
+    def _emit_step(self, raw):
+        step = raw.strip()
+        if not step: return
+        self.steps.append(step)
+        if self.on_step: self.on_step(step)
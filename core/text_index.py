@@ -0,0 +1,99 @@
+import difflib
+import math
+import re
+from collections import defaultdict
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+class TextIndex:
+    """Token and grid index over one OCR snapshot, for ranked "click text" lookups."""
+    def __init__(self, blocks, cell=200):
+        self.cell = cell
+        self.entries = []
+        self.tokens = defaultdict(set) # token -> entry ids
+        self.grid = defaultdict(list)  # (col, row) -> entry ids
+        for i, b in enumerate(blocks):
+            xs = [p[0] for p in b["box"]]; ys = [p[1] for p in b["box"]]
+            rect = (min(xs), min(ys), max(xs), max(ys))
+            center = ((rect[0] + rect[2]) / 2, (rect[1] + rect[3]) / 2)
+            toks = tokenize(b["text"])
+            self.entries.append({"block": b, "norm": " ".join(toks), "tokens": toks, "rect": rect,
+                                 "center": center, "confidence": b.get("confidence", 1.0)})
+            for t in toks: self.tokens[t].add(i)
+            self.grid[(int(center[0] // cell), int(center[1] // cell))].append(i)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def near(self, x, y, radius):
+        """Entry ids whose center lies within `radius` pixels of (x, y)."""
+        c = self.cell; ids = []
+        for col in range(int((x - radius) // c), int((x + radius) // c) + 1):
+            for row in range(int((y - radius) // c), int((y + radius) // c) + 1):
+                for i in self.grid.get((col, row), ()):
+                    cx, cy = self.entries[i]["center"]
+                    if (cx - x) ** 2 + (cy - y) ** 2 <= radius * radius: ids.append(i)
+        return ids
+
+    def _candidates(self, q_tokens, query, fuzzy, cutoff):
+        ids = set(); vocab = self.tokens.keys()
+        for qt in q_tokens:
+            ids |= self.tokens.get(qt, set())
+            # Substring hits ("save" in "autosave") keep the old `in` semantics
+            for t in vocab:
+                if qt != t and qt in t: ids |= self.tokens[t]
+            if fuzzy:
+                for t in difflib.get_close_matches(qt, vocab, n=5, cutoff=cutoff): ids |= self.tokens[t]
+        if not ids and query:
+            ids = {i for i, e in enumerate(self.entries) if query in e["norm"]}
+        return ids
+
+    def _match_score(self, e, query, q_tokens, fuzzy, cutoff):
+        if e["norm"] == query: return 1.0
+        if query and query in e["norm"]: return 0.9
+        toks = set(e["tokens"])
+        if all(qt in toks for qt in q_tokens): return 0.85
+        if not fuzzy: return 0.0
+        # Fuzzy: average best per-token similarity, only for near-identical text (OCR misreads)
+        sims = [max((difflib.SequenceMatcher(None, qt, t).ratio() for t in toks), default=0.0) for qt in q_tokens]
+        avg = sum(sims) / len(sims) if sims else 0.0
+        return 0.8 * avg if avg >= cutoff else 0.0
+
+    def search(self, query, near=None, radius=None, region=None, fuzzy=False, fuzzy_cutoff=0.9, min_confidence=0.0, min_score=0.5, limit=5):
+        """Returns [(score, block)] best first.
+
+        By default only exact, whole-token or substring matches count, so text that is not on
+        screen finds nothing rather than a lookalike ("Close" never hits "Clone repository").
+        fuzzy=True also accepts blocks whose tokens are at least `fuzzy_cutoff` similar.
+
+        near: (x, y) prefers closer matches (only those within `radius` if given);
+        region: {"left","top","width","height"} keeps only blocks centered inside it,
+        e.g. the active window geometry.
+        """
+        q_tokens = tokenize(query); q = " ".join(q_tokens)
+        if not q_tokens: return []
+        candidates = self._candidates(q_tokens, q, fuzzy, fuzzy_cutoff)
+        if near and radius: candidates &= set(self.near(near[0], near[1], radius))
+        results = []
+        for i in candidates:
+            e = self.entries[i]
+            if e["confidence"] < min_confidence: continue
+            if region:
+                cx, cy = e["center"]
+                if not (region["left"] <= cx < region["left"] + region["width"] and region["top"] <= cy < region["top"] + region["height"]): continue
+            score = self._match_score(e, q, q_tokens, fuzzy, fuzzy_cutoff)
+            if score < min_score: continue
+            score *= 0.6 + 0.4 * e["confidence"]
+            if near:
+                dist = math.hypot(e["center"][0] - near[0], e["center"][1] - near[1])
+                score *= 1.0 / (1.0 + dist / 1000.0)
+            results.append((score, e["block"]))
+        results.sort(key=lambda r: r[0], reverse=True)
+        return results[:limit]
+
+    def find(self, query, **kwargs):
+        hits = self.search(query, limit=1, **kwargs)
+        return hits[0][1] if hits else None
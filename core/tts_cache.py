@@ -0,0 +1,117 @@
+import collections
+import hashlib
+import os
+import threading
+import numpy as np
+
+class TTSCache:
+    """Content-addressed cache of decoded speech PCM, in memory and on disk, both LRU.
+
+    Keys are a hash of (voice, text). Disk entries are float32 .npy files named
+    <key>.<samplerate>.npy; the directory is capped at `max_bytes`.
+    """
+    def __init__(self, cache_dir="data/tts_cache", max_bytes=200 * 1024 * 1024, memory_items=64, max_text_len=240):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self.max_text_len = max_text_len # Long one-off answers are not worth storing
+        self._memory = collections.OrderedDict() # key -> (pcm, fs)
+        self._disk = collections.OrderedDict()   # key -> (path, fs, size), least recently used first
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0; self.disk_hits = 0; self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            parts = name.split(".")
+            if len(parts) != 3 or parts[2] != "npy": continue
+            path = os.path.join(self.cache_dir, name)
+            try: st = os.stat(path)
+            except OSError: continue
+            entries.append((st.st_mtime, parts[0], path, int(parts[1]), st.st_size))
+        for _, key, path, fs, size in sorted(entries):
+            self._disk[key] = (path, fs, size); self._disk_bytes += size
+
+    @staticmethod
+    def key(text, voice):
+        return hashlib.sha1(f"{voice}\n{text}".encode("utf-8")).hexdigest()
+
+    def get(self, text, voice):
+        """Returns (pcm, samplerate) or None."""
+        k = self.key(text, voice)
+        with self._lock:
+            if k in self._memory:
+                self._memory.move_to_end(k); self.hits += 1
+                return self._memory[k]
+            entry = self._disk.get(k)
+            if entry: self._disk.move_to_end(k)
+        if entry:
+            try:
+                pcm = np.load(entry[0]); os.utime(entry[0])
+            except (OSError, ValueError):
+                with self._lock: self._drop_disk(k)
+                return None
+            with self._lock:
+                self.hits += 1; self.disk_hits += 1
+                self._remember(k, pcm, entry[1])
+            return pcm, entry[1]
+        return None
+
+    def put(self, text, voice, pcm, fs):
+        if len(text) > self.max_text_len: return
+        k = self.key(text, voice)
+        pcm = np.ascontiguousarray(pcm, dtype=np.float32)
+        with self._lock: self._remember(k, pcm, fs)
+        # Disk write happens off the playback path
+        threading.Thread(target=self._write_disk, args=(k, pcm, fs), daemon=True).start()
+
+    def get_or_synthesize(self, text, voice, synthesize):
+        """Returns cached (pcm, fs) or calls synthesize() -> (pcm, fs) and stores the result."""
+        cached = self.get(text, voice)
+        if cached is not None: return cached
+        with self._lock: self.misses += 1
+        pcm, fs = synthesize()
+        self.put(text, voice, pcm, fs)
+        return np.asarray(pcm, dtype=np.float32), fs
+
+    def _remember(self, k, pcm, fs):
+        # Caller holds self._lock
+        self._memory[k] = (pcm, fs); self._memory.move_to_end(k)
+        while len(self._memory) > self.memory_items: self._memory.popitem(last=False)
+
+    def _write_disk(self, k, pcm, fs):
+        path = os.path.join(self.cache_dir, f"{k}.{fs}.npy")
+        tmp = path + ".tmp"
+        try:
+            with open(tmp, "wb") as f: np.save(f, pcm)
+            os.replace(tmp, path)
+            size = os.path.getsize(path)
+        except OSError as e:
+            print(f"[TTS Cache] Write failed: {e}"); return
+        with self._lock:
+            if k in self._disk: self._disk_bytes -= self._disk[k][2]
+            self._disk[k] = (path, fs, size); self._disk.move_to_end(k); self._disk_bytes += size
+            while self._disk_bytes > self.max_bytes and len(self._disk) > 1:
+                self._drop_disk(next(iter(self._disk)))
+
+    def _drop_disk(self, k):
+        # Caller holds self._lock
+        path, _, size = self._disk.pop(k)
+        self._disk_bytes -= size
+        try: os.remove(path)
+        except OSError: pass
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses,
+                    "hit_rate": self.hits / total if total else 0.0,
+                    "memory_items": len(self._memory), "disk_items": len(self._disk), "disk_bytes": self._disk_bytes}
+
+    def get_stats_report(self):
+        s = self.stats()
+        return (f"- {s['hits']} hits ({s['disk_hits']} from disk), {s['misses']} misses, hit rate {s['hit_rate']:.0%}\n"
+                f"- {s['memory_items']} clips in memory, {s['disk_items']} on disk ({s['disk_bytes'] / 1e6:.1f} MB)")
@@ -0,0 +1,143 @@
+import zlib
+import numpy as np
+
+# Sentence punctuation around a word; symbols inside or after it ("notepad++", "c#", "c:\a\b.exe") are kept
+EDGE_PUNCTUATION = ".,;:!?\"'()[]{}<>"
+
+# Politeness and wake words that do not change what the user wants done
+FILLER_WORDS = frozenset({
+    "please", "pls", "plz", "kindly", "thanks", "thank", "you", "hey", "hi", "alex", "ok", "okay",
+    "can", "could", "would", "will", "just", "now", "quickly", "for", "me", "the", "a", "an", "some",
+})
+
+def normalize(text):
+    """Lowercase content words with filler removed: "hey, open spotify please" -> "open spotify"."""
+    tokens = [t for t in (w.strip(EDGE_PUNCTUATION) for w in text.lower().split()) if t]
+    content = [t for t in tokens if t not in FILLER_WORDS]
+    return " ".join(content or tokens)
+
+# Verbs that ask for the same action; any other pair of different verbs is a different command
+VERB_SYNONYMS = [
+    {"open", "launch", "start", "run"},
+    {"close", "quit", "exit"},
+    {"search", "find", "google", "lookup"},
+    {"show", "display", "view"},
+    {"play", "resume"},
+]
+_VERB_GROUP = {verb: i for i, group in enumerate(VERB_SYNONYMS) for verb in group}
+
+def verb(key):
+    """The first word of a normalized command."""
+    return key.split(" ", 1)[0]
+
+def arguments(key):
+    """The words after the verb of a normalized command: what it acts on."""
+    return tuple(key.split()[1:])
+
+def same_verb(a, b):
+    """True if two verbs are equal or listed as synonyms."""
+    return a == b or (a in _VERB_GROUP and _VERB_GROUP.get(a) == _VERB_GROUP.get(b))
+
+class HashedVectorizer:
+    """Stateless text embedding: word unigrams, word bigrams and character trigrams hashed into `dim`
+    signed buckets, L2-normalized. No vocabulary to fit or persist, so vectors stay comparable forever.
+    """
+    def __init__(self, dim=512, word_weight=1.0, bigram_weight=0.7, char_weight=0.35):
+        self.dim = dim
+        self.weights = (word_weight, bigram_weight, char_weight)
+
+    def _features(self, text):
+        words = text.split()
+        w, b, c = self.weights
+        for t in words: yield "w:" + t, w
+        for x, y in zip(words, words[1:]): yield f"b:{x} {y}", b
+        padded = f" {text} "
+        for i in range(len(padded) - 2): yield "c:" + padded[i:i+3], c
+
+    def transform(self, text):
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for feat, weight in self._features(text):
+            h = zlib.crc32(feat.encode("utf-8"))
+            vec[h % self.dim] += weight if h & 0x80000000 else -weight
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+def index_terms(text):
+    """Words and their character trigrams, used to shortlist rows before the dense cosine pass."""
+    terms = set()
+    for w in text.split():
+        terms.add(w)
+        padded = f" {w} "
+        terms.update(padded[i:i+3] for i in range(len(padded) - 2))
+    return terms
+
+class VectorIndex:
+    """Growable row matrix of unit vectors keyed by string, with an inverted term index.
+
+    search() scores only rows sharing one of the query's rarest terms (the shortest posting lists,
+    up to `cap` rows), so the dense product stays small as the index grows. Re-adding a key
+    overwrites its row; removed rows are recycled.
+    """
+    def __init__(self, dim=512, initial=256, probe_terms=4):
+        self.dim = dim
+        self.probe_terms = probe_terms
+        self.matrix = np.zeros((initial, dim), dtype=np.float32)
+        self.keys = [None] * initial
+        self.rows = {}     # key -> row
+        self.postings = {} # term -> set of rows
+        self._terms = {}   # row -> terms, for removal
+        self._free = list(range(initial - 1, -1, -1))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def add(self, key, vec, terms=()):
+        row = self.rows.get(key)
+        if row is None:
+            if not self._free: self._grow()
+            row = self._free.pop(); self.rows[key] = row; self.keys[row] = key
+        else:
+            self._unpost(row)
+        self.matrix[row] = vec
+        self._terms[row] = terms = frozenset(terms)
+        for t in terms: self.postings.setdefault(t, set()).add(row)
+
+    def remove(self, key):
+        row = self.rows.pop(key, None)
+        if row is None: return
+        self._unpost(row)
+        self.matrix[row] = 0; self.keys[row] = None; self._free.append(row)
+
+    def _unpost(self, row):
+        for t in self._terms.pop(row, ()):
+            rows = self.postings.get(t)
+            if rows is not None:
+                rows.discard(row)
+                if not rows: del self.postings[t]
+
+    def _grow(self):
+        n = len(self.keys)
+        self.matrix = np.vstack([self.matrix, np.zeros((n, self.dim), dtype=np.float32)])
+        self.keys.extend([None] * n)
+        self._free.extend(range(2 * n - 1, n - 1, -1))
+
+    def _shortlist(self, terms, cap):
+        rows = set()
+        for postings in sorted((self.postings[t] for t in terms if t in self.postings), key=len)[:self.probe_terms]:
+            if rows and len(rows) + len(postings) > cap: break
+            rows |= postings
+        return rows
+
+    def search(self, vec, k=1, min_score=0.0, terms=None, cap=2048):
+        """[(cosine, key)] best first. Without `terms` every row is scored."""
+        if not self.rows: return []
+        if terms is None:
+            ids = np.arange(len(self.keys)); scores = self.matrix @ vec
+        else:
+            rows = self._shortlist(terms, cap)
+            if not rows: return [] # Not a single word or trigram in common
+            ids = np.fromiter(rows, dtype=np.intp, count=len(rows)); scores = self.matrix[ids] @ vec
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        hits = [(float(scores[j]), self.keys[ids[j]]) for j in top if self.keys[ids[j]] is not None and scores[j] >= min_score]
+        return sorted(hits, key=lambda h: -h[0])
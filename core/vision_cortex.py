@@ -1,16 +1,32 @@
 import pyautogui
 import pygetwindow as gw
-import easyocr
 import numpy as np
 from PIL import Image
 import os
+import concurrent.futures
+from core.ocr_engine import IncrementalOCR, read_blocks
+from core.text_index import TextIndex
+from core.ocr_worker import OCRWorkerPool
 
 class VisionCortex:
-    def __init__(self):
-        # Initialize EasyOCR reader (English by default)
-        # Note: This will download models on first run (~100MB)
+    def __init__(self, use_worker_pool=True, workers=1, torch_threads=2):
+        # Larger captures (4K, multi-monitor) are detected downscaled and recognized per box
+        self.max_side = 1920; self.two_stage = True
+        self.torch_threads = torch_threads
+        self.reader = None; self.pool = None
+        # Note: EasyOCR downloads its models on first run (~100MB)
         print("[Vision] Initializing Local OCR Engine...")
-        self.reader = easyocr.Reader(['en'], gpu=False) # Set gpu=True if user has CUDA
+        if use_worker_pool:
+            try:
+                # Inference runs in separate processes so it never holds this process's GIL
+                self.pool = OCRWorkerPool(workers=workers, torch_threads=torch_threads, max_side=self.max_side, two_stage=self.two_stage)
+            except Exception as e:
+                print(f"[Vision] OCR worker pool unavailable ({e}); using in-process OCR.")
+        if self.pool is None: self._load_local_reader()
+        # Each source submits under its own key, so a newer frame supersedes a queued stale one
+        self.ocr_engine = IncrementalOCR(lambda img: self._recognize(img, key="screen"))
+        self.window_engine = IncrementalOCR(lambda img: self._recognize(img, key="window"))
+        self._text_index = None; self._text_index_id = None
         print("[Vision] OCR Engine Ready.")
 
     def get_screen_context(self):
@@ -31,48 +47,101 @@ class VisionCortex:
         except:
             return {"active_window": "Unknown", "cursor_pos": {"x": 0, "y": 0}}
 
-    def ocr_screen(self):
-        """Performs OCR on the entire screen and returns a list of text blocks."""
+    def _load_local_reader(self):
+        import easyocr # Deferred: pulls in torch, which dominates cold start
         try:
-            screenshot = pyautogui.screenshot()
-            # Convert PIL image to numpy array for EasyOCR
-            img_np = np.array(screenshot)
-            
-            # Read text
-            results = self.reader.readtext(img_np)
-            
-            # Format: [{"text": "...", "box": [[x,y], ...], "confidence": 0.9}]
-            text_blocks = []
-            for (bbox, text, prob) in results:
-                text_blocks.append({
-                    "text": text,
-                    "box": bbox,
-                    "confidence": prob
-                })
-            return text_blocks
+            import torch
+            torch.set_num_threads(self.torch_threads)
+        except ImportError: pass
+        self.reader = easyocr.Reader(['en'], gpu=False) # Set gpu=True if user has CUDA
+
+    def _recognize(self, img_np, key=None):
+        """Runs EasyOCR on an image and returns text blocks in the image's coordinates.
+
+        Raises CancelledError when a newer request with the same `key` superseded this one, so an
+        incremental engine keeps its previous frame instead of caching an empty one.
+        """
+        if self.pool is not None:
+            try:
+                return self.pool.recognize(img_np, key=key, timeout=120)
+            except concurrent.futures.CancelledError: raise
+            except Exception as e:
+                if self.pool.is_alive(): raise
+                print(f"[Vision] OCR worker died ({e}); falling back to in-process OCR.")
+                self.pool = None; self._load_local_reader()
+        return read_blocks(self.reader, img_np, max_side=self.max_side, two_stage=self.two_stage)
+
+    def shutdown(self):
+        if self.pool: self.pool.shutdown()
+
+    def ocr_screen(self, mode="full", region=None):
+        """Performs OCR and returns a list of text blocks in screen coordinates.
+
+        mode "full": the entire screen; "window": only the active window.
+        region: (left, top, width, height) to OCR just that rectangle.
+        Full-screen and window passes only re-recognize tiles that changed since the previous call.
+        """
+        try:
+            engine = self.ocr_engine
+            if region is None and mode == "window":
+                geo = self.get_screen_context().get("window_geometry")
+                if geo and geo["width"] > 0 and geo["height"] > 0:
+                    region = (geo["left"], geo["top"], geo["width"], geo["height"]); engine = self.window_engine
+            if region is None:
+                # Convert PIL image to numpy array for EasyOCR
+                return engine.process(np.array(pyautogui.screenshot()))
+            left, top, width, height = [int(v) for v in region]
+            left, top = max(0, left), max(0, top)
+            img = np.array(pyautogui.screenshot(region=(left, top, width, height)))
+            blocks = engine.process(img) if engine is self.window_engine else self._recognize(img, key="region")
+            return [dict(b, box=[[p[0] + left, p[1] + top] for p in b["box"]]) for b in blocks]
+        except concurrent.futures.CancelledError:
+            return [] # Superseded by a newer frame
         except Exception as e:
             print(f"[Vision] OCR Error: {e}")
             return []
 
-    def find_text_coordinates(self, target_text):
-        """Searches for a specific text on screen and returns its center coordinates."""
-        blocks = self.ocr_screen()
-        if not blocks: return None
-        
-        target_text = target_text.lower()
-        for block in blocks:
-            if target_text in block["text"].lower():
-                bbox = block["box"]
-                x_center = (bbox[0][0] + bbox[1][0]) / 2
-                y_center = (bbox[0][1] + bbox[2][1]) / 2
-                return [int(x_center), int(y_center)]
-        return None
+    def get_text_index(self):
+        """OCRs the screen and returns a TextIndex, rebuilt only when the text blocks changed.
+
+        A failed or superseded pass leaves frame_id as it was, so it drops the cached index and
+        returns an empty one rather than the previous screen's text.
+        """
+        try: blocks = self.ocr_engine.process(np.array(pyautogui.screenshot()))
+        except Exception as e:
+            if not isinstance(e, concurrent.futures.CancelledError): print(f"[Vision] OCR Error: {e}")
+            self._text_index = None; self._text_index_id = None
+            return TextIndex([])
+        frame_id = self.ocr_engine.frame_id
+        if self._text_index is None or self._text_index_id != frame_id:
+            self._text_index = TextIndex(blocks); self._text_index_id = frame_id
+        return self._text_index
+
+    def find_text_coordinates(self, target_text, near=None, active_window_only=True, fuzzy=False):
+        """Searches for a specific text on screen and returns its center coordinates.
+
+        Matches inside the active window win; `near` is an (x, y) point or another visible text.
+        Only exact or substring matches are clicked unless `fuzzy` is set.
+        """
+        index = self.get_text_index()
+        if not len(index): return None
+        if isinstance(near, str):
+            anchor = index.find(near)
+            near = self._center(anchor["box"]) if anchor else None
+        block = None
+        if active_window_only:
+            geo = self.get_screen_context().get("window_geometry")
+            if geo: block = index.find(target_text, near=near, region=geo, fuzzy=fuzzy)
+        if block is None: block = index.find(target_text, near=near, fuzzy=fuzzy)
+        return [int(c) for c in self._center(block["box"])] if block else None
+
+    @staticmethod
+    def _center(bbox):
+        return (bbox[0][0] + bbox[1][0]) / 2, (bbox[0][1] + bbox[2][1]) / 2
 
     def verify_text_on_screen(self, target_text):
         """Checks if a specific text is currently visible."""
-        blocks = self.ocr_screen()
-        target_text = target_text.lower()
-        return any(target_text in b["text"].lower() for b in blocks)
+        return self.get_text_index().find(target_text, fuzzy=False) is not None
 
     def get_context_string(self):
         ctx = self.get_screen_context()
@@ -80,7 +149,7 @@ class VisionCortex:
         labels_str = ", ".join(labels[:15]) # Top 15 labels
         return f"Currently focus is on '{ctx['active_window']}'. Visible elements: [{labels_str}]. Cursor at {ctx['cursor_pos']['x']}, {ctx['cursor_pos']['y']}."
 
-    def get_all_ui_labels(self):
-        """Returns a list of all text strings currently visible on screen."""
-        blocks = self.ocr_screen()
+    def get_all_ui_labels(self, mode="window"):
+        """Returns a list of all text strings currently visible (by default in the active window)."""
+        blocks = self.ocr_screen(mode=mode)
         return [b["text"] for b in blocks if b["confidence"] > 0.5]
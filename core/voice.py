@@ -6,38 +6,53 @@ import numpy as np
 import scipy.io.wavfile as wav
 import os
 import tempfile
-import time
 import queue
 import asyncio
 import edge_tts
 import pyttsx3
 import uuid
-import json
 import zipfile
 import requests
 from vosk import Model, KaldiRecognizer
+from core.listener import StreamingListener
+from core.tts_cache import TTSCache
+from core.streaming import split_sentences
+from core.audio_buffer import LevelMeter
 
 class VoiceEngine:
     def __init__(self):
         self.speech_queue = queue.Queue()
         self.is_speaking = False
         self.loop = asyncio.new_event_loop()
+        # Repeated phrases ("Opening X", monitor alerts) play straight from decoded PCM
+        self.tts_cache = TTSCache()
         
         # Offline TTS Fallback
         self.offline_engine = pyttsx3.init()
         self.offline_engine.setProperty('rate', 160)
         
-        # Local STT (Vosk)
+        # Local STT (Vosk) - loaded on first listen() or by the Brain's warm-up pool
         self.model_path = "data/vosk-model-small-en-us-0.15"
-        self._ensure_vosk_model()
-        self.model = Model(self.model_path)
-        self.recognizer = KaldiRecognizer(self.model, 16000)
+        self.model = None; self.recognizer = None
+        self._model_lock = threading.Lock()
         
+        # Two-stage pipeline: sentence N+1 is synthesized while sentence N plays
+        self.lookahead = 2
+        self.audio_queue = queue.Queue(maxsize=self.lookahead)
+        self._generation = 0 # Bumped by interrupt(); stale sentences are dropped
+        # Talking over Alex stops the current answer. Off by default: there is no echo cancellation, so
+        # on speakers the mic hears Alex's own voice; enable it with a headset.
+        self.barge_in = False
         threading.Thread(target=self._speech_handler, args=(self.loop,), daemon=True).start()
+        threading.Thread(target=self._playback_handler, daemon=True).start()
 
         self.mic_available = True
-        self.current_volume = 0.0 
+        self.meter = LevelMeter() # Real playback/mic levels for the UI
+        self.output_gain = 4.0 # Speech RMS sits around 0.1-0.2; scale it to fill the meter
         self.is_listening = False
+        self.on_partial = None # Called with the running transcript while the user speaks
+        self.listener = None
+        self.input_stream_factory = None # Defaults to sounddevice.InputStream; tests can pass WavInputStream.factory(path)
         print("[Voice] Local Independent Voice Engine Online.")
 
     def _ensure_vosk_model(self):
@@ -58,84 +73,131 @@ class VoiceEngine:
             os.remove(zip_path)
             print("[Voice] Local model installed.")
 
+    def load_stt_model(self):
+        """Loads the Vosk model once; safe to call from several threads."""
+        with self._model_lock:
+            if self.recognizer is None:
+                self._ensure_vosk_model()
+                self.model = Model(self.model_path)
+                self.recognizer = KaldiRecognizer(self.model, 16000)
+        return self.recognizer
+
+    def _synthesize(self, text, voice, loop):
+        """Edge TTS -> temporary mp3 -> decoded float32 PCM."""
+        unique_filename = f"speech_{uuid.uuid4().hex}.mp3"
+        tmp_file = os.path.join(tempfile.gettempdir(), unique_filename)
+        try:
+            loop.run_until_complete(edge_tts.Communicate(text, voice).save(tmp_file))
+            return sf.read(tmp_file, dtype='float32')
+        finally:
+            if os.path.exists(tmp_file): os.remove(tmp_file)
+
     def _speech_handler(self, loop):
+        """Synthesis stage: splits each utterance into sentences and renders them ahead of playback."""
         asyncio.set_event_loop(loop)
         VOICE = "en-US-GuyNeural" 
         while True:
             text = self.speech_queue.get()
-            if text is None: break
+            if text is None: self.audio_queue.put(None); break
+            gen = self._generation
+            try:
+                for sentence in split_sentences(text):
+                    if gen != self._generation: break # Interrupted
+                    try:
+                        data, fs = self.tts_cache.get_or_synthesize(sentence, VOICE, lambda: self._synthesize(sentence, VOICE, loop))
+                        item = (gen, data, fs)
+                    except Exception:
+                        item = (gen, sentence, None) # Offline fallback, spoken by the playback stage
+                    # Blocks once `lookahead` sentences are waiting, bounding synthesis work and memory
+                    self.audio_queue.put(item)
+            finally:
+                self.speech_queue.task_done()
+
+    def _playback_handler(self):
+        """Playback stage: plays rendered sentences in order while the next ones are synthesized."""
+        while True:
+            item = self.audio_queue.get()
+            if item is None: break
+            gen, data, fs = item
+            if gen != self._generation: continue # Flushed by interrupt()
             self.is_speaking = True
             try:
-                unique_filename = f"speech_{uuid.uuid4().hex}.mp3"
-                tmp_file = os.path.join(tempfile.gettempdir(), unique_filename)
-                loop.run_until_complete(edge_tts.Communicate(text, VOICE).save(tmp_file))
-                
-                data, fs = sf.read(tmp_file)
-                event = threading.Event()
-                def callback(outdata, frames, time, status):
-                    chunk_size = len(outdata)
-                    if len(data) > current_frame[0]:
-                        chunk = data[current_frame[0]:current_frame[0]+chunk_size]
-                        # Handle Mono to Stereo or shape issues
-                        if len(chunk.shape) == 1: 
-                            chunk = np.repeat(chunk[:, np.newaxis], outdata.shape[1], axis=1)
-                        
-                        # Handle the last chunk which might be smaller than outdata
-                        if len(chunk) < chunk_size:
-                            outdata[:len(chunk)] = chunk
-                            outdata[len(chunk):] = 0
-                            event.set()
-                        else:
-                            outdata[:] = chunk
-                        current_frame[0] += chunk_size
-                    else:
-                        outdata.fill(0); event.set()
-                current_frame = [0]
-                with sd.OutputStream(samplerate=fs, channels=data.shape[1] if len(data.shape) > 1 else 1, callback=callback):
-                    while not event.is_set():
-                        self.current_volume = 0.5 + (np.random.rand() * 0.2); time.sleep(0.05)
-                    event.wait()
-                if os.path.exists(tmp_file): os.remove(tmp_file)
-            except:
-                self.offline_engine.say(text); self.offline_engine.runAndWait()
+                if fs is None:
+                    self.offline_engine.say(data); self.offline_engine.runAndWait()
+                else:
+                    self._play(data, fs, gen)
+            except Exception as e:
+                print(f"[Voice] Playback Error: {e}")
             finally:
-                self.is_speaking = False; self.current_volume = 0.0; self.speech_queue.task_done()
+                if self.audio_queue.empty() and self.speech_queue.unfinished_tasks == 0:
+                    self.is_speaking = False; self.meter.update(0.0)
+
+    def _play(self, data, fs, gen):
+        event = threading.Event()
+        current_frame = [0]
+        def callback(outdata, frames, time, status):
+            if gen != self._generation:
+                outdata.fill(0); event.set(); return
+            chunk_size = len(outdata)
+            if len(data) > current_frame[0]:
+                chunk = data[current_frame[0]:current_frame[0]+chunk_size]
+                self.meter.update(LevelMeter.rms(chunk) * self.output_gain)
+                # Handle Mono to Stereo or shape issues
+                if len(chunk.shape) == 1: 
+                    chunk = np.repeat(chunk[:, np.newaxis], outdata.shape[1], axis=1)
+                
+                # Handle the last chunk which might be smaller than outdata
+                if len(chunk) < chunk_size:
+                    outdata[:len(chunk)] = chunk
+                    outdata[len(chunk):] = 0
+                    event.set()
+                else:
+                    outdata[:] = chunk
+                current_frame[0] += chunk_size
+            else:
+                outdata.fill(0); event.set()
+        with sd.OutputStream(samplerate=fs, channels=data.shape[1] if len(data.shape) > 1 else 1, callback=callback):
+            event.wait()
+        self.meter.update(0.0)
+
+    def interrupt(self):
+        """Stops the current sentence and drops everything queued (user barge-in or STOP)."""
+        self._generation += 1
+        for q in (self.speech_queue, self.audio_queue):
+            while True:
+                try: item = q.get_nowait()
+                except queue.Empty: break
+                if item is None: q.put(None); break # Keep shutdown requests
+                if q is self.speech_queue: q.task_done()
+        self.is_speaking = False; self.meter.update(0.0)
+
+    def _on_user_speech(self):
+        if self.barge_in and self.is_speaking: self.interrupt()
 
     def speak(self, text):
         print(f"AI: {text}"); self.speech_queue.put(text)
 
     def listen(self):
-        """100% Local Listening using Vosk."""
+        """100% Local Listening using Vosk, streamed block by block until trailing silence."""
         try:
-            fs = 16000
+            self.load_stt_model()
             print("Listening...")
             self.is_listening = True
-            recorded_frames = []
-            
-            def callback(indata, frames, time, status):
-                recorded_frames.append(indata.copy())
-                self.current_volume = np.linalg.norm(indata) / 1000
-
-            with sd.InputStream(samplerate=fs, channels=1, dtype='int16', callback=callback):
-                # We record in chunks and check for speech locally
-                start_time = time.time()
-                while time.time() - start_time < 5: # 5s timeout
-                    sd.sleep(100)
-            
-            self.is_listening = False; self.current_volume = 0.0
-            if not recorded_frames: return None, None
-            
-            full_audio = np.concatenate(recorded_frames, axis=0)
-            # Process via Vosk
-            if self.recognizer.AcceptWaveform(full_audio.tobytes()):
-                result = json.loads(self.recognizer.Result())
-                text = result.get("text", "")
-                if text: print(f"User: {text}"); return text, full_audio
-            else:
-                result = json.loads(self.recognizer.PartialResult())
-                text = result.get("partial", "")
-                if text: print(f"User (partial): {text}"); return text, full_audio
-                
-            return None, None
+            if self.listener is None:
+                # Built once so its capture ring buffer is allocated once per session
+                self.listener = StreamingListener(self.recognizer, self.input_stream_factory or sd.InputStream,
+                                                  on_partial=self.on_partial, on_level=self._set_listen_level,
+                                                  on_speech_start=self._on_user_speech)
+            text, audio = self.listener.listen()
+            self.is_listening = False; self.meter.update(0.0)
+            if text: print(f"User: {text}")
+            return text, audio
         except Exception as e:
-            print(f"STT Error: {e}"); self.is_listening = False; return None, None
\ No newline at end of file
+            print(f"STT Error: {e}"); self.is_listening = False; return None, None
+
+    def _set_listen_level(self, level):
+        self.meter.update(level)
+
+    @property
+    def current_volume(self):
+        return self.meter.value
@@ -1,41 +1,75 @@
-import json
 import os
 import time
 
+from core.storage import open_storage, DEFAULT_DB
+
 DATA_DIR = "data"
 WORKFLOW_FILE = os.path.join(DATA_DIR, "workflows.json")
 
+# Default example workflows, seeded into an empty store
+DEFAULT_WORKFLOWS = {
+    "coding mode": [
+        {"action": "say", "data": "Initializing coding environment."},
+        {"action": "open", "data": "code"},
+        {"action": "open", "data": "spotify"},
+        {"action": "say", "data": "Ready to code."}
+    ],
+    "good morning": [
+        {"action": "say", "data": "Good morning, sir."},
+        {"action": "command", "data": "time"},
+        {"action": "command", "data": "date"},
+        {"action": "command", "data": "how is my system doing"}
+    ]
+}
+
 class WorkflowManager:
-    def __init__(self, brain):
+    def __init__(self, brain, storage=None):
         self.brain = brain
+        self.db = storage or open_storage(DEFAULT_DB)
         self.workflows = self._load_workflows()
 
     def _load_workflows(self):
-        if not os.path.exists(WORKFLOW_FILE):
-            # Default example workflow
-            default_data = {
-                "coding mode": [
-                    {"action": "say", "data": "Initializing coding environment."},
-                    {"action": "open", "data": "code"},
-                    {"action": "open", "data": "spotify"},
-                    {"action": "say", "data": "Ready to code."}
-                ],
-                "good morning": [
-                    {"action": "say", "data": "Good morning, sir."},
-                    {"action": "command", "data": "time"},
-                    {"action": "command", "data": "date"},
-                    {"action": "command", "data": "how is my system doing"}
-                ]
-            }
-            with open(WORKFLOW_FILE, 'w') as f:
-                json.dump(default_data, f, indent=2)
-            return default_data
-        
-        try:
-            with open(WORKFLOW_FILE, 'r') as f:
-                return json.load(f)
-        except:
-            return {}
+        self.db.migrate_json(WORKFLOW_FILE, lambda workflows: self.db.put_many("workflows", workflows.items()))
+        workflows = self.db.items("workflows")
+        if not workflows and self.db.get("workflow.meta", "seeded") is None:
+            with self.db.transaction():
+                self.db.put_many("workflows", DEFAULT_WORKFLOWS.items())
+                self.db.put("workflow.meta", "seeded", True)
+            workflows = dict(DEFAULT_WORKFLOWS)
+        return workflows
+
+    def save_workflow(self, name, steps):
+        self.workflows[name.lower()] = steps
+        self.db.put("workflows", name.lower(), steps)
+
+    # --- mined candidates ---
+    def add_candidate(self, commands, support):
+        """Stores a routine mined from the user's history as a workflow the user can accept.
+
+        Idempotent: a routine already saved, pending or dismissed is left alone. Returns the name
+        for a new candidate, else None.
+        """
+        name = " then ".join(commands)
+        if name in self.workflows or self.db.get("workflow.candidates", name) is not None: return None
+        steps = [{"action": "command", "data": cmd} for cmd in commands]
+        self.db.put("workflow.candidates", name, {"steps": steps, "support": support, "status": "pending", "found": time.time()})
+        return name
+
+    def get_candidates(self):
+        """{name: candidate} for routines awaiting the user's decision."""
+        return {n: c for n, c in self.db.items("workflow.candidates").items() if c["status"] == "pending"}
+
+    def accept_candidate(self, name, workflow_name=None):
+        candidate = self.db.get("workflow.candidates", name)
+        if not candidate: return False
+        with self.db.transaction():
+            self.save_workflow(workflow_name or name, candidate["steps"])
+            self.db.put("workflow.candidates", name, {**candidate, "status": "accepted"})
+        return True
+
+    def dismiss_candidate(self, name):
+        candidate = self.db.get("workflow.candidates", name)
+        if candidate: self.db.put("workflow.candidates", name, {**candidate, "status": "dismissed"})
 
     def execute_workflow(self, workflow_name):
         workflow_name = workflow_name.lower()
@@ -21,12 +21,15 @@ class WorkerSignals(QObject):
     update_log = Signal(str, str)
     status_changed = Signal(str)
     show_preview = Signal(Action)
+    update_preview = Signal(Action)
     show_live = Signal(int, int, str, int)
     show_result = Signal(str)
     show_critical = Signal(str)
     update_available = Signal(str)
     log_tab = Signal(str, str)
     show_ripple = Signal(int, int)
+    partial_transcript = Signal(str)
+    audio_level = Signal(float)
 
 class ListenThread(threading.Thread):
     def __init__(self, voice, brain, signals):
@@ -38,6 +41,7 @@ class ListenThread(threading.Thread):
             if self.voice.mic_available:
                 self.signals.status_changed.emit("LISTENING")
                 command, audio_raw = self.voice.listen()
+                self.signals.partial_transcript.emit("")
                 if command or audio_raw is not None:
                     self.signals.status_changed.emit("PROCESSING")
                     if command: self.signals.update_log.emit("User", command)
@@ -82,6 +86,8 @@ class MainWindow(QMainWindow):
         self.signals.update_log.connect(self.append_chat)
         self.signals.status_changed.connect(self.update_state)
         self.signals.update_available.connect(self._notify_update)
+        self.signals.partial_transcript.connect(self._show_partial)
+        self.voice.on_partial = self.signals.partial_transcript.emit
         
         self.dashboard = MasterDashboard()
         self.signals.log_tab.connect(self.dashboard.route_log)
@@ -120,11 +126,13 @@ class MainWindow(QMainWindow):
         input_container = QHBoxLayout(); self.input_field = QLineEdit(); self.input_field.setPlaceholderText("TRANSMIT COMMAND..."); self.input_field.returnPressed.connect(self.handle_text_input); input_container.addStretch(); input_container.addWidget(self.input_field, stretch=4); input_container.addStretch(); self.main_layout.addLayout(input_container)
 
         self.popup_preview = ActionPreviewPopup(); self.popup_live = LiveExecutionPopup(); self.popup_result = ResultPopup(); self.popup_critical = CriticalConfirmationPopup()
-        self.signals.show_preview.connect(self.popup_preview.show_action); self.signals.show_live.connect(self.popup_live.update); self.signals.show_result.connect(lambda m: self.popup_result.show_success(m)); self.signals.show_critical.connect(self.popup_critical.show_critical)
-        self.popup_preview.authorized.connect(self.brain.set_auth_result); self.popup_critical.confirmed.connect(self.brain.set_auth_result)
+        self.signals.show_preview.connect(self.popup_preview.show_action); self.signals.update_preview.connect(self.popup_preview.update_action); self.signals.show_live.connect(self.popup_live.update); self.signals.show_result.connect(lambda m: self.popup_result.show_success(m)); self.signals.show_critical.connect(self.popup_critical.show_critical)
+        self.popup_preview.authorized.connect(lambda ok: self.brain.set_auth_result(ok, shown=self.popup_preview.shown_steps)); self.popup_preview.always_authorized.connect(lambda: self.brain.set_auth_result(True, remember=True, shown=self.popup_preview.shown_steps)); self.popup_critical.confirmed.connect(self.brain.set_auth_result)
+        self.popup_live.stop_requested.connect(self.brain.stop)
 
         self.listen_thread = ListenThread(self.voice, self.brain, self.signals); self.listen_thread.daemon = True; self.listen_thread.start()
-        self.audio_timer = QTimer(self); self.audio_timer.timeout.connect(self.update_audio); self.audio_timer.start(30)
+        # The meter notifies from the audio thread only when the level visibly changes
+        self.signals.audio_level.connect(self.audio_bar.set_amplitude); self.voice.meter.subscribe(self.signals.audio_level.emit)
         self.clock_timer = QTimer(self); self.clock_timer.timeout.connect(self._update_time); self.clock_timer.start(1000)
         
         # AI Status Polling
@@ -156,11 +164,11 @@ class MainWindow(QMainWindow):
         self.append_chat("SYSTEM", f"🚀 A new version (v{version}) is available on GitHub!")
         self.popup_result.show_success(f"Update Available: v{version}")
 
+    def _show_partial(self, text): self.input_field.setPlaceholderText(f"HEARING: {text}" if text else "TRANSMIT COMMAND...")
     def switch_to_mini(self): self.hide(); self.mini_mode.show()
     def restore_from_mini(self): self.mini_mode.hide(); self.show()
     def _force_focus(self): self.show(); self.raise_(); self.activateWindow(); self.input_field.setFocus()
     def _update_time(self): self.time_label.setText(f"SYSTEM TIME: {datetime.datetime.now().strftime('%H:%M:%S')}")
-    def update_audio(self): self.audio_bar.set_amplitude(self.voice.current_volume)
     def handle_text_input(self):
         cmd = self.input_field.text().strip()
         if cmd:
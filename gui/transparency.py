@@ -1,16 +1,18 @@
+import html
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QProgressBar, QFrame, QLineEdit
 from PySide6.QtCore import Qt, Signal, QTimer, QPoint
 from PySide6.QtGui import QColor, QFont, QScreen, QGuiApplication, QCursor
 
 class Action:
     """The internal contract for every AI action."""
-    def __init__(self, title, desc, tool, risk_score=0, steps=None):
+    def __init__(self, title, desc, tool, risk_score=0, steps=None, origin=None):
         self.id = id(self)
         self.title = title
         self.description = desc
         self.tool = tool
         self.risk_score = risk_score # 0-100
         self.steps = steps or []
+        self.origin = origin # Where a replayed plan came from, e.g. "open spotify (episode 0.91)"
         self.estimated_time = "2 sec"
         self.reversible = True
 
@@ -62,10 +64,13 @@ class GlassPopup(QWidget):
 # --- A. PREVIEW POPUP ---
 class ActionPreviewPopup(GlassPopup):
     authorized = Signal(bool)
+    always_authorized = Signal() # Allow, and stop asking for this chain
     def __init__(self):
         super().__init__("AI Action Preview")
         self.setFixedWidth(300)
         self.info = QLabel("")
+        self.info.setWordWrap(True)
+        self.shown_steps = 0
         self.content.addWidget(self.info)
         
         btns = QHBoxLayout()
@@ -77,16 +82,28 @@ class ActionPreviewPopup(GlassPopup):
         
         self.allow_btn.clicked.connect(lambda: self.authorized.emit(True))
         self.deny_btn.clicked.connect(lambda: self.authorized.emit(False))
+        self.always_btn.clicked.connect(self.always_authorized.emit)
 
     def show_action(self, action: Action):
         risk_color = "🟢 Low" if action.risk_score < 25 else "🟡 Medium" if action.risk_score < 60 else "🔴 High"
         text = f"<b>Intent:</b> {action.title}<br><b>Tool:</b> {action.tool}<br><b>Risk:</b> {risk_color}<br><b>Time:</b> {action.estimated_time}"
+        if action.origin: text += f"<br><b>Replaying:</b> {html.escape(action.origin)}"
+        steps = [s.strip() for s in action.steps if s.strip()]
+        if steps:
+            text += "<br><b>Steps:</b><br>" + "<br>".join(f"{i}. {html.escape(s)}" for i, s in enumerate(steps[:8], 1))
+            if len(steps) > 8: text += f"<br>... and {len(steps) - 8} more"
         self.info.setText(text)
+        self.shown_steps = len(action.steps) # What an answer given now covers
         self.show()
         self.position_near_tray()
 
+    def update_action(self, action: Action):
+        """Re-renders an open preview as more steps stream in."""
+        if self.isVisible(): self.show_action(action)
+
 # --- B. LIVE POPUP ---
 class LiveExecutionPopup(GlassPopup):
+    stop_requested = Signal()
     def __init__(self):
         super().__init__("Executing Action")
         self.setFixedWidth(280)
@@ -100,6 +117,7 @@ class LiveExecutionPopup(GlassPopup):
         
         stop_btn = QPushButton("STOP NOW")
         stop_btn.setStyleSheet("color: #ff3333; font-weight: bold;")
+        stop_btn.clicked.connect(self.stop_requested.emit)
         self.content.addWidget(stop_btn)
 
     def update(self, step, total, desc, progress):
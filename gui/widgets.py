@@ -162,17 +162,20 @@ class AudioBar(QWidget):
         self.target_amplitude = 0
         self.color = QColor(color)
         
-        # Smooth animation timer
+        # Smooth animation timer; only runs while the bars are catching up to a new level
         self.timer = QTimer(self)
         self.timer.timeout.connect(self.animate)
-        self.timer.start(20)
 
     def set_amplitude(self, value):
         self.target_amplitude = value
+        if not self.timer.isActive(): self.timer.start(20)
 
     def animate(self):
         diff = self.target_amplitude - self.amplitude
-        self.amplitude += diff * 0.2
+        if abs(diff) < 0.005:
+            self.amplitude = self.target_amplitude; self.timer.stop()
+        else:
+            self.amplitude += diff * 0.2
         self.update()
 
     def paintEvent(self, event):